@@ -1,11 +1,21 @@
-import requests
 import sys
 import os
 import time
+import argparse
 from datetime import datetime
+from daoproxy.sources import RAW_PROXY_SITES
+from daoproxy.scrape import scrape_sources, FETCH_WORKERS
+from daoproxy.ratelimit import SOURCE_RATE
+from daoproxy.validate import is_valid_proxy  # noqa: F401 (giữ tương thích)
+from daoproxy.export import write_proxy_list
+from daoproxy.source_stats import SourceStats, save_proxy_sources
+from daoproxy.seen import SeenFilter, SEEN_FILE
+from daoproxy.metrics import metrics, instrument_requests
+from daoproxy import dnscache
 
 def check_internet_connection():
     """Kiểm tra kết nối internet"""
+    import requests
     try:
         response = requests.get("https://www.google.com/", timeout=5)
         return True
@@ -14,8 +24,9 @@ def check_internet_connection():
         sys.exit(1)
 
 def clear():
-    """Clear màn hình"""
-    os.system("cls" if os.name == "nt" else "clear")
+    """Clear màn hình (bỏ qua khi chạy từ cron / pipe)"""
+    if sys.stdout.isatty():
+        os.system("cls" if os.name == "nt" else "clear")
 
 def print_banner():
     """In banner với màu sắc"""
@@ -26,139 +37,64 @@ def print_banner():
 \033[0m"""
     print(banner)
 
-def is_valid_proxy(line):
-    """Validate định dạng IP:PORT"""
-    if ':' not in line:
-        return False
-    parts = line.split(':', 1)
-    if len(parts) != 2:
-        return False
-    ip, port = parts
-    # Kiểm tra port là số
-    if not port.isdigit():
-        return False
-    # Kiểm tra IP có 4 phần
-    ip_parts = ip.split('.')
-    if len(ip_parts) != 4:
-        return False
-    return True
+def scrape_proxies(sites=None, source_stats=None, workers=FETCH_WORKERS, rate=SOURCE_RATE):
+    """Lấy proxy từ các nguồn
 
-def scrape_proxies():
-    """Lấy proxy từ các nguồn"""
-    
-    # Danh sách nguồn proxy (đã fix thiếu dấu phẩy)
-    raw_proxy_sites = [
-        "https://api.proxyscrape.com/?request=displayproxies&proxytype=http",
-        "https://api.openproxylist.xyz/http.txt",
-        "http://worm.rip/http.txt",
-        "https://proxy-spider.com/api/proxies.example.txt",
-        "https://raw.githubusercontent.com/proxy4parsing/proxy-list/main/http.txt",
-        "https://proxyspace.pro/http.txt",
-        "https://raw.githubusercontent.com/jetkai/proxy-list/main/online-proxies/txt/proxies-https.txt",
-        "https://raw.githubusercontent.com/jetkai/proxy-list/main/online-proxies/txt/proxies-http.txt",
-        "https://raw.githubusercontent.com/roosterkid/openproxylist/main/HTTPS_RAW.txt",
-        "https://raw.githubusercontent.com/TheSpeedX/PROXY-List/master/http.txt",
-        "https://raw.githubusercontent.com/mmpx12/proxy-list/master/http.txt",
-        "https://raw.githubusercontent.com/mmpx12/proxy-list/master/https.txt",
-        "https://raw.githubusercontent.com/ShiftyTR/Proxy-List/master/http.txt",
-        "https://raw.githubusercontent.com/ShiftyTR/Proxy-List/master/https.txt",
-        "https://raw.githubusercontent.com/almroot/proxylist/master/list.txt",
-        "https://openproxylist.xyz/http.txt",
-        "https://raw.githubusercontent.com/monosans/proxy-list/main/proxies_anonymous/http.txt",
-        "http://rootjazz.com/proxies/proxies.txt",
-        "https://api.proxyscrape.com/?request=displayproxies&proxytype=https",
-        "https://www.proxy-list.download/api/v1/get?type=http",
-        "https://raw.githubusercontent.com/TheSpeedX/SOCKS-List/master/http.txt",
-        "https://raw.githubusercontent.com/shiftytr/proxy-list/master/proxy.txt",
-        "https://raw.githubusercontent.com/clarketm/proxy-list/master/proxy-list-raw.txt",
-        "https://raw.githubusercontent.com/sunny9577/proxy-scraper/master/proxies.txt",
-        "https://raw.githubusercontent.com/opsxcq/proxy-list/master/list.txt",
-        # "https://multiproxy.org/txt_all/proxy.txt",  # Commented vì DNS thường lỗi
-        "https://proxyspace.pro/https.txt",
-        "https://raw.githubusercontent.com/aslisk/proxyhttps/main/https.txt",
-        "https://raw.githubusercontent.com/B4RC0DE-TM/proxy-list/main/HTTP.txt",
-        "https://raw.githubusercontent.com/hendrikbgr/Free-Proxy-Repo/master/proxy_list.txt",
-        "https://raw.githubusercontent.com/ALIILAPRO/Proxy/main/http.txt",
-        "https://raw.githubusercontent.com/Skiddle-ID/proxylist/refs/heads/main/generated/http_proxies.txt",
-        "https://raw.githubusercontent.com/fahimscirex/proxybd/refs/heads/master/proxylist/http.txt",
-        "https://raw.githubusercontent.com/yemixzy/proxy-list/refs/heads/main/proxies/http.txt",
-        "https://raw.githubusercontent.com/TuanMinPay/live-proxy/refs/heads/master/http.txt",
-        "https://raw.githubusercontent.com/TuanMinPay/live-proxy/refs/heads/master/all.txt",
-        "https://raw.githubusercontent.com/Vann-Dev/proxy-list/refs/heads/main/proxies/http.txt",
-        "https://raw.githubusercontent.com/Vann-Dev/proxy-list/refs/heads/main/proxies/https.txt",
-        "https://raw.githubusercontent.com/r00tee/Proxy-List/main/Https.txt",
-        "https://github.com/zloi-user/hideip.me/raw/refs/heads/master/http.txt",
-        "https://github.com/zloi-user/hideip.me/raw/refs/heads/master/https.txt",
-        "https://raw.githubusercontent.com/dpangestuw/Free-Proxy/refs/heads/main/All_proxies.txt",
-        "https://raw.githubusercontent.com/Zaeem20/FREE_PROXIES_LIST/refs/heads/master/http.txt",
-        "https://raw.githubusercontent.com/Zaeem20/FREE_PROXIES_LIST/refs/heads/master/https.txt",
-        "https://raw.githubusercontent.com/ErcinDedeoglu/proxies/refs/heads/main/proxies/http.txt",
-        "https://raw.githubusercontent.com/TuanMinPay/live-proxy/refs/heads/master/socks4.txt",
-        "https://raw.githubusercontent.com/ErcinDedeoglu/proxies/refs/heads/main/proxies/https.txt",
-        "https://raw.githubusercontent.com/yemixzy/proxy-list/refs/heads/main/proxies/unchecked.txt",
-        "https://raw.githubusercontent.com/zloi-user/hideip.me/main/http.txt",
-        "https://raw.githubusercontent.com/zloi-user/hideip.me/main/https.txt",
-        "https://raw.githubusercontent.com/BreakingTechFr/Proxy_Free/main/proxies/http.txt",
-        "https://raw.githubusercontent.com/dpangestuw/Free-Proxy/refs/heads/main/http_proxies.txt",
-        "https://raw.githubusercontent.com/proxifly/free-proxy-list/main/proxies/protocols/http/data.txt",
-        "https://raw.githubusercontent.com/vakhov/fresh-proxy-list/master/http.txt",
-        "https://raw.githubusercontent.com/vakhov/fresh-proxy-list/master/https.txt",
-        "https://raw.githubusercontent.com/MuRongPIG/Proxy-Master/main/http.txt",
-        "https://sunny9577.github.io/proxy-scraper/generated/http_proxies.txt",
-        "https://raw.githubusercontent.com/proxifly/free-proxy-list/refs/heads/main/proxies/protocols/https/data.txt",
-        "https://raw.githubusercontent.com/monosans/proxy-list/refs/heads/main/proxies/http.txt",
-        "https://raw.githubusercontent.com/Skiddle-ID/proxylist/refs/heads/main/generated/socks4_proxies.txt",
-        "https://raw.githubusercontent.com/yemixzy/proxy-list/refs/heads/main/proxies/socks4.txt",
-        "https://raw.githubusercontent.com/saisuiu/uiu/main/free.txt",
-        "https://raw.githubusercontent.com/ShiftyTR/Proxy-List/master/https.txt",
-        "https://raw.githubusercontent.com/rdavydov/proxy-list/main/proxies/http.txt",
-        "https://raw.githubusercontent.com/ShiftyTR/Proxy-List/master/http.txt",
-        "https://www.proxy-list.download/api/v1/get?type=https",
-        "https://raw.githubusercontent.com/saisuiu/Lionkings-Http-Proxys-Proxies/main/free.txt",
-        "https://raw.githubusercontent.com/saisuiu/Lionkings-Http-Proxys-Proxies/main/cnfree.txt",
-        "https://raw.githubusercontent.com/zevtyardt/proxy-list/main/http.txt",
-        "https://raw.githubusercontent.com/Zaeem20/FREE_PROXIES_LIST/master/http.txt",
-        "https://raw.githubusercontent.com/rdavydov/proxy-list/main/proxies_anonymous/http.txt",
-        "https://sunny9577.github.io/proxy-scraper/proxies.txt",  # Fix thiếu dấu phẩy
-        "https://vakhov.github.io/fresh-proxy-list/http.txt",
-        "https://raw.githubusercontent.com/mmpx12/proxy-list/refs/heads/master/http.txt",
-        "https://raw.githubusercontent.com/mmpx12/proxy-list/refs/heads/master/https.txt",
-        "https://raw.githubusercontent.com/Zaeem20/FREE_PROXIES_LIST/refs/heads/master/http.txt",
-    ]
-    
-    proxies = set()  # Dùng set để tự động loại trùng
-    total_sources = len(raw_proxy_sites)
+    Trả về dict proxy -> set nguồn đã liệt kê proxy đó
+    """
+    sites = RAW_PROXY_SITES if sites is None else sites
+    total_sources = len(sites)
+    done = [0]
     
     print(f"\033[1;33m[*] Đang lấy proxy từ {total_sources} nguồn...\033[0m\n")
     
-    for idx, site in enumerate(raw_proxy_sites, 1):
-        try:
-            print(f"\033[1;36m[{idx}/{total_sources}] Đang lấy từ: {site[:60]}...\033[0m", end="")
-            response = requests.get(site, timeout=10)
-            
-            if response.status_code == 200:
-                count_before = len(proxies)
-                for line in response.text.split('\n'):
-                    line = line.strip()
-                    if is_valid_proxy(line):
-                        # Chỉ lấy IP:PORT, bỏ phần thừa nếu có
-                        ip, port = line.split(':', 1)
-                        proxies.add(f'{ip}:{port}')
-                
-                count_after = len(proxies)
-                new_proxies = count_after - count_before
-                print(f" \033[1;32m✓ (+{new_proxies})\033[0m")
-            else:
-                print(f" \033[1;31m✗ (HTTP {response.status_code})\033[0m")
-                
-        except Exception as e:
-            print(f" \033[1;31m✗ (Error: {str(e)[:30]}...)\033[0m")
-    
-    return list(proxies)
+    def on_source(site, new_proxies, error):
+        done[0] += 1
+        print(f"\033[1;36m[{done[0]}/{total_sources}] {site[:60]}...\033[0m", end="")
+        if error is None:
+            print(f" \033[1;32m✓ (+{new_proxies})\033[0m")
+        else:
+            print(f" \033[1;31m✗ ({error[:30]})\033[0m")
+    
+    return scrape_sources(sites, workers, source_stats=source_stats, on_source=on_source, rate=rate)
+
+def print_source_report(source_stats, limit=20):
+    """In bảng chất lượng nguồn (tốt nhất trước)"""
+    rows = source_stats.report()
+    print(f"\033[1;33m{'Live%':>7} {'Unique':>7} {'Listed':>7} {'Median':>7}  Nguồn\033[0m")
+    for row in rows[:limit] + (rows[-limit:] if len(rows) > 2 * limit else rows[limit:]):
+        ratio = f"{row['live_ratio'] * 100:.2f}" if row["live_ratio"] is not None else "-"
+        median = f"{row['median_ms']}ms" if row["median_ms"] is not None else "-"
+        print(f"{ratio:>7} {row['unique']:>7} {row['listed']:>7} {median:>7}  {row['url'][:70]}")
 
 def main():
-    # Kiểm tra internet
-    check_internet_connection()
+    parser = argparse.ArgumentParser(description="Proxy scraper")
+    parser.add_argument("--output", "-o", default="proxy.txt", help="File lưu proxy (default: proxy.txt)")
+    parser.add_argument("--auto-tune", action="store_true",
+                        help="Bỏ qua / đẩy xuống cuối các nguồn có tỉ lệ live thấp (dựa trên source_stats.json)")
+    parser.add_argument("--source-report", action="store_true", help="Chỉ in bảng chất lượng nguồn rồi thoát")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="Mở /metrics (Prometheus) và /summary (JSON) tại 127.0.0.1:PORT (default: tắt)")
+    parser.add_argument("--metrics-json", help="Ghi thống kê thời gian từng giai đoạn (JSON) khi kết thúc")
+    parser.add_argument("--workers", type=int, default=FETCH_WORKERS,
+                        help=f"Số nguồn tải song song (default: {FETCH_WORKERS})")
+    parser.add_argument("--source-rate", type=float, default=SOURCE_RATE,
+                        help=f"Tối đa request/s tới mỗi host nguồn, 0 = không giới hạn (default: {SOURCE_RATE})")
+    parser.add_argument("--seen-filter", nargs="?", const=SEEN_FILE, metavar="FILE",
+                        help=f"Đánh dấu proxy mới so với các lần checker.py đã check (default: {SEEN_FILE})")
+    parser.add_argument("--new-only", action="store_true", help="Chỉ lưu proxy chưa từng được check (bật --seen-filter)")
+    args = parser.parse_args()
+    
+    source_stats = SourceStats()
+    if args.source_report:
+        print_source_report(source_stats)
+        return
+    
+    instrument_requests()
+    # Phân giải trước các host nguồn trong lúc in banner (vài host cho hàng chục URL)
+    dnscache.install(dnscache.hosts_of(RAW_PROXY_SITES))
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
     
     # Clear và hiện banner
     clear()
@@ -169,22 +105,58 @@ def main():
     print(f"\033[1;36m           Admin: PHUCNGX \033[1;32m| \033[1;36mThời gian: {now.strftime('%H:%M:%S %d/%m/%Y')}")
     print("\033[1;36m           NOTE: CHỜ ĐỢI LÀ HẠNH PHÚC, HÃY CHỜ THÊM CHÚT NỮA 😇\n\033[0m")
     
+    # Auto-tune: sắp xếp nguồn theo chất lượng, bỏ nguồn chết
+    sites = RAW_PROXY_SITES
+    if args.auto_tune:
+        sites, skipped = source_stats.plan(RAW_PROXY_SITES)
+        if skipped:
+            print(f"\033[1;33m[*] Auto-tune: bỏ qua {len(skipped)} nguồn không hiệu quả\033[0m")
+    
     # Bắt đầu scrape
     start_time = time.time()
-    proxies = scrape_proxies()
+    proxy_sources = scrape_proxies(sites, source_stats, args.workers, args.source_rate or None)
+    proxies = list(proxy_sources)
+    
+    # Chỉ kiểm tra internet khi mọi nguồn đều lỗi
+    if not metrics.counts()["fetch_ok"]:
+        check_internet_connection()
+    
+    # Proxy mới = chưa có trong bộ lọc Bloom mà checker.py ghi lại qua các lần chạy
+    new_count = None
+    if args.seen_filter or args.new_only:
+        with SeenFilter(args.seen_filter or SEEN_FILE) as seen:
+            new, _ = seen.split_new(proxies)
+        new_count = len(new)
+        if args.new_only:
+            proxies = new
     elapsed = round(time.time() - start_time, 2)
     
     # Thống kê
     print(f"\n\033[1;32m{'='*60}\033[0m")
-    print(f"\033[1;33m✅ Tổng proxy thu thập: {len(proxies)}\033[0m")
+    print(f"\033[1;33m✅ Tổng proxy thu thập: {len(proxy_sources)}\033[0m")
+    if new_count is not None:
+        print(f"\033[1;33m🆕 Proxy mới: {new_count} (đã check trước đó: {len(proxy_sources) - new_count})\033[0m")
     print(f"\033[1;33m⏱️  Thời gian: {elapsed}s\033[0m")
+    phases = metrics.summary()["phases"]
+    print("\033[1;36m   " + " | ".join(f"{name} {phase['total_s']}s" for name, phase in phases.items()) + "\033[0m")
+    dns = dnscache.dns_cache.stats()
+    if dns["hit_rate"] is not None:
+        print(f"\033[1;36m   DNS cache: {dns['hit_rate'] * 100:.1f}% hit ({dns['hits']}/{dns['hits'] + dns['misses']})\033[0m")
     print(f"\033[1;32m{'='*60}\033[0m\n")
     
     # Lưu file
-    output_file = "proxy.txt"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for proxy in sorted(proxies):  # Sort để dễ đọc
-            f.write(proxy + '\n')
+    output_file = args.output
+    with metrics.timer("export"):
+        write_proxy_list(sorted(proxies), output_file)  # Sort để dễ đọc
+        
+        # Lưu nguồn của từng proxy để checker.py thống kê chất lượng nguồn
+        save_proxy_sources(proxy_sources)
+        source_stats.save()
+    metrics.incr("exported", len(proxies))
+    
+    if args.metrics_json:
+        metrics.stop()
+        metrics.write_summary(args.metrics_json)
     
     print(f"\033[1;32m[✓] Đã lưu {len(proxies)} proxy vào file: {output_file}\033[0m")
     
@@ -193,7 +165,8 @@ def main():
     print_banner()
     print("\033[1;36m[*] Hoàn tất! Cảm ơn bạn đã sử dụng! 😊\033[0m\n")
     
-    time.sleep(3)
+    if sys.stdout.isatty():
+        time.sleep(3)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""Parse throughput benchmark on synthetic multi-million-line bodies
+
+Usage: python -m benchmarks.bench_parse [--lines 2000000] [--bodies 4] [--workers N]
+"""
+import argparse
+import os
+import random
+import time
+
+from daoproxy.parse_pool import ParsePool, parse_chunk, merge_sorted_unique
+
+
+def make_body(lines, seed, dup_ratio=0.3, junk_ratio=0.05):
+    """Random ip:port lines with duplicates, junk and CRLF endings mixed in"""
+    rng = random.Random(seed)
+    out = []
+    pool = []
+    for _ in range(lines):
+        r = rng.random()
+        if r < junk_ratio:
+            out.append(rng.choice(["# comment", "", "999.1.1.1:80", "1.2.3:80", "1.2.3.4:port", "<br>"]))
+        elif r < junk_ratio + dup_ratio and pool:
+            out.append(rng.choice(pool))
+        else:
+            proxy = (f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}."
+                     f"{rng.randint(1, 254)}:{rng.choice((80, 8080, 3128, 1080, rng.randint(1, 65535)))}")
+            pool.append(proxy)
+            out.append(proxy)
+    return ("\r\n" if seed % 2 else "\n").join(out).encode()
+
+
+def baseline(bodies):
+    """Old path: decode, split, validate and set.add line by line"""
+    proxies = set()
+    for body in bodies:
+        for line in body.decode().split("\n"):
+            line = line.strip()
+            if ":" not in line:
+                continue
+            ip, port = line.split(":", 1)
+            parts = ip.split(".")
+            if port.isdigit() and len(parts) == 4 and all(p.isdigit() and 0 <= int(p) <= 255 for p in parts):
+                proxies.add(line)
+    return len(proxies)
+
+
+def single(bodies):
+    return len(merge_sorted_unique(parse_chunk(body)[0] for body in bodies))
+
+
+def pooled(bodies, workers):
+    with ParsePool(workers=workers) as pool:
+        return len(merge_sorted_unique(pool.parse(body, "lines")[0] for body in bodies))
+
+
+def timed(name, total_lines, func, *args):
+    start = time.perf_counter()
+    count = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<22} {elapsed:8.2f}s {total_lines / elapsed / 1e6:8.2f} M lines/s  unique={count}")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse stage benchmark")
+    parser.add_argument("--lines", type=int, default=2000000, help="Lines per body (default: 2000000)")
+    parser.add_argument("--bodies", type=int, default=4, help="Number of bodies (default: 4)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parse processes (default: cpu count)")
+    args = parser.parse_args()
+
+    print(f"Generating {args.bodies} x {args.lines} lines...")
+    bodies = [make_body(args.lines, seed) for seed in range(args.bodies)]
+    total = args.lines * args.bodies
+    print(f"{sum(map(len, bodies)) / 1e6:.1f} MB total\n")
+
+    counts = {
+        timed("baseline (str/set)", total, baseline, bodies),
+        timed("packed, 1 process", total, single, bodies),
+        timed(f"packed, {args.workers} processes", total, pooled, bodies, args.workers),
+    }
+    if len(counts) != 1:
+        print(f"!! unique counts differ: {counts}")
+
+
+if __name__ == "__main__":
+    main()
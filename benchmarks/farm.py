@@ -0,0 +1,340 @@
+"""Local fake proxy farm: judge, source servers and thousands of stand-in proxies on loopback
+
+Behaviours:
+  alive      HTTP proxy (absolute-URI GET and CONNECT), forwards to the target
+  slow       like alive, waits slow_delay seconds before answering
+  socks      SOCKS5 (no auth) proxy
+  dead       nothing listening, connection refused
+  filtered   SYNs are dropped, the connect times out (full accept queue, Linux)
+  blackhole  accepts the connection and never answers
+
+Alive/slow proxies forward as transparent, anonymous or elite (added headers).
+On Linux proxies are spread over 127.x.y.z so each one has its own IP.
+"""
+import asyncio
+import json
+import random
+import socket
+import sys
+import threading
+from urllib.parse import urlsplit
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_MIX = {"alive": 0.2, "slow": 0.05, "socks": 0.1, "dead": 0.35, "filtered": 0.15, "blackhole": 0.15}
+FILTER_FILL = 4  # Kết nối giữ sẵn để lấp đầy hàng đợi accept của proxy "filtered"
+ANONYMITY = ("transparent", "anonymous", "elite")
+LOCATIONS = [
+    ("Vietnam", "Hanoi", "VNPT", "AS45899 VNPT Corp"),
+    ("Indonesia", "Jakarta", "Telkom", "AS7713 Telekomunikasi"),
+    ("United States", "Ashburn", "Amazon", "AS14618 Amazon.com"),
+    ("India", "Mumbai", "Jio", "AS55836 Reliance Jio"),
+    ("Ukraine", "Kyiv", "Kyivstar", "AS15895 Kyivstar"),
+    ("Germany", "Frankfurt", "Hetzner", "AS24940 Hetzner Online"),
+]
+JUNK_LINES = ["# free proxies", "", "999.1.1.1:80", "1.2.3:80", "<br>", "1.2.3.4:port"]
+
+
+def parse_mix(text):
+    """'alive=0.2,dead=0.8' -> dict"""
+    mix = {}
+    for part in text.split(","):
+        name, _, share = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise ValueError(f"unknown behaviour {name!r}")
+        mix[name.strip()] = float(share)
+    return mix
+
+
+async def pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+async def relay(client_reader, client_writer, upstream_reader, upstream_writer):
+    await asyncio.gather(pipe(client_reader, upstream_writer), pipe(upstream_reader, client_writer))
+
+
+class Farm:
+    """Runs every fake server on one asyncio loop in a background thread"""
+
+    def __init__(self, proxies=1000, mix=None, slow_delay=2.0, sources=5, source_junk=0.05,
+                 spread_ips=None, seed=1, clustered=0.0):
+        self.count = proxies
+        self.clustered = clustered  # Xác suất proxy cùng hành vi với proxy đầu tiên trên IP của nó
+        self.mix = mix or DEFAULT_MIX
+        self.slow_delay = slow_delay
+        self.source_count = sources
+        self.source_junk = source_junk
+        self.spread_ips = sys.platform.startswith("linux") if spread_ips is None else spread_ips
+        self.rng = random.Random(seed)
+        self.proxies = []          # (ip:port, behaviour, anonymity)
+        self.sources = {}          # path -> body
+        self.servers = []
+        self.reserved = []         # sockets of dead / filtered proxies (never accepted)
+        self.loop = None
+        self.thread = None
+        self.judge_url = None
+        self.source_urls = []
+
+    # ----- lifecycle -----
+
+    def start(self):
+        # Mỗi proxy giữ 1 socket lắng nghe, nâng giới hạn file descriptor
+        if resource is not None:
+            soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+            if soft < hard:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self.thread.start()
+        ready.wait()
+        return self
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._setup())
+        ready.set()
+        self.loop.run_forever()
+
+    def stop(self):
+        async def close():
+            for server in self.servers:
+                server.close()
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        for sock in self.reserved:
+            sock.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ----- setup -----
+
+    def _address(self, index):
+        if not self.spread_ips:
+            return "127.0.0.1"
+        # Nhóm 16 proxy / IP, 200 IP / subnet /24 -> giống danh sách thật
+        host = index // 16
+        return f"127.{1 + host // 50000 % 254}.{host // 200 % 250}.{1 + host % 200}"
+
+    async def _setup(self):
+        judge = await asyncio.start_server(self._judge, "127.0.0.1", 0)
+        self.servers.append(judge)
+        self.judge_url = f"http://127.0.0.1:{judge.sockets[0].getsockname()[1]}/json"
+
+        names = list(self.mix)
+        weights = [self.mix[n] for n in names]
+        first_on_ip = {}
+        for index in range(self.count):
+            behaviour = self.rng.choices(names, weights)[0]
+            anonymity = self.rng.choice(ANONYMITY)
+            ip = self._address(index)
+            # Danh sách thật: cả IP / dải của một nhà cung cấp thường cùng sống hoặc cùng chết
+            if ip in first_on_ip and self.rng.random() < self.clustered:
+                behaviour = first_on_ip[ip]
+            first_on_ip.setdefault(ip, behaviour)
+            if behaviour == "dead":
+                # Bind nhưng không listen -> connection refused, port không bị server khác lấy
+                sock = socket.socket()
+                sock.bind((ip, 0))
+                port = sock.getsockname()[1]
+                self.reserved.append(sock)
+            elif behaviour == "filtered":
+                # listen(0) không bao giờ accept; hàng đợi đầy thì kernel bỏ SYN mới -> connect timeout
+                sock = socket.socket()
+                sock.bind((ip, 0))
+                sock.listen(0)
+                port = sock.getsockname()[1]
+                self.reserved.append(sock)
+                for _ in range(FILTER_FILL):
+                    filler = socket.socket()
+                    filler.setblocking(False)
+                    filler.connect_ex((ip, port))
+                    self.reserved.append(filler)
+            else:
+                handler = {
+                    "alive": lambda r, w, ip=ip, a=anonymity: self._http_proxy(r, w, ip, a, 0),
+                    "slow": lambda r, w, ip=ip, a=anonymity: self._http_proxy(r, w, ip, a, self.slow_delay),
+                    "socks": lambda r, w, ip=ip: self._socks_proxy(r, w, ip),
+                    "blackhole": self._blackhole,
+                }[behaviour]
+                server = await asyncio.start_server(handler, ip, 0, backlog=64)
+                self.servers.append(server)
+                port = server.sockets[0].getsockname()[1]
+            self.proxies.append((f"{ip}:{port}", behaviour, anonymity))
+
+        # Mỗi nguồn liệt kê một phần farm, các nguồn chồng lên nhau
+        for i in range(self.source_count):
+            lines = [p for p, _, _ in self.proxies if self.rng.random() < 0.5]
+            lines += [self.rng.choice(JUNK_LINES) for _ in range(int(len(lines) * self.source_junk))]
+            self.rng.shuffle(lines)
+            self.sources[f"/list{i}.txt"] = "\n".join(lines).encode()
+        source = await asyncio.start_server(self._source, "127.0.0.1", 0)
+        self.servers.append(source)
+        port = source.sockets[0].getsockname()[1]
+        self.source_urls = [f"http://127.0.0.1:{port}{path}" for path in self.sources]
+
+    def expected(self):
+        """Behaviour -> number of proxies"""
+        counts = {}
+        for _, behaviour, _ in self.proxies:
+            counts[behaviour] = counts.get(behaviour, 0) + 1
+        return counts
+
+    # ----- servers -----
+
+    @staticmethod
+    async def _read_head(reader):
+        head = await reader.readuntil(b"\r\n\r\n")
+        line, *header_lines = head.decode("latin-1").split("\r\n")
+        headers = {}
+        for header in header_lines:
+            if ":" in header:
+                name, value = header.split(":", 1)
+                headers[name.strip()] = value.strip()
+        return line.split(" "), headers
+
+    @staticmethod
+    async def _respond(writer, status, body, content_type="application/json"):
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+        writer.close()
+
+    async def _judge(self, reader, writer):
+        """ip-api style JSON, plus the headers and origin IP the judge saw"""
+        try:
+            (method, target, _), headers = await self._read_head(reader)
+        except (asyncio.IncompleteReadError, ValueError, ConnectionError):
+            writer.close()
+            return
+        origin = writer.get_extra_info("peername")[0]
+        country, city, isp, asn = LOCATIONS[sum(map(ord, origin)) % len(LOCATIONS)]
+        body = json.dumps({
+            "status": "success", "country": country, "city": city, "isp": isp, "org": isp,
+            "as": asn, "query": origin, "proxy": False, "method": method, "path": target,
+            "headers": headers,
+        }).encode()
+        await self._respond(writer, "200 OK", body)
+
+    async def _source(self, reader, writer):
+        try:
+            (_, target, _), _ = await self._read_head(reader)
+        except (asyncio.IncompleteReadError, ValueError, ConnectionError):
+            writer.close()
+            return
+        body = self.sources.get(urlsplit(target).path)
+        if body is None:
+            await self._respond(writer, "404 Not Found", b"", "text/plain")
+        else:
+            await self._respond(writer, "200 OK", body, "text/plain")
+
+    async def _http_proxy(self, reader, writer, ip, anonymity, delay):
+        try:
+            (method, target, version), headers = await self._read_head(reader)
+            if delay:
+                await asyncio.sleep(delay)
+            if method == "CONNECT":
+                host, port = target.rsplit(":", 1)
+                up_reader, up_writer = await asyncio.open_connection(host, int(port), local_addr=(ip, 0))
+                writer.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+                await relay(reader, writer, up_reader, up_writer)
+                return
+
+            url = urlsplit(target)
+            path = url.path or "/"
+            if url.query:
+                path += "?" + url.query
+            for name in ("Proxy-Connection", "Connection", "Keep-Alive", "Proxy-Authorization"):
+                headers.pop(name, None)
+            client_ip = writer.get_extra_info("peername")[0]
+            if anonymity == "transparent":
+                headers["X-Forwarded-For"] = client_ip
+                headers["Via"] = "1.1 farm-proxy"
+            elif anonymity == "anonymous":
+                headers["Via"] = "1.1 farm-proxy"
+            headers["Connection"] = "close"
+            request = f"{method} {path} {version}\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+
+            up_reader, up_writer = await asyncio.open_connection(url.hostname, url.port or 80, local_addr=(ip, 0))
+            up_writer.write(request.encode("latin-1") + b"\r\n")
+            await up_writer.drain()
+            await pipe(up_reader, writer)
+            up_writer.close()
+        except (asyncio.IncompleteReadError, ValueError, ConnectionError, OSError):
+            writer.close()
+
+    async def _socks_proxy(self, reader, writer, ip):
+        try:
+            version, methods = await reader.readexactly(2)
+            await reader.readexactly(methods)
+            if version != 5:
+                writer.close()
+                return
+            writer.write(b"\x05\x00")
+            _, command, _, address_type = await reader.readexactly(4)
+            if address_type == 1:
+                host = socket.inet_ntoa(await reader.readexactly(4))
+            elif address_type == 3:
+                host = (await reader.readexactly((await reader.readexactly(1))[0])).decode()
+            else:
+                host = socket.inet_ntop(socket.AF_INET6, await reader.readexactly(16))
+            port = int.from_bytes(await reader.readexactly(2), "big")
+            if command != 1:
+                writer.write(b"\x05\x07\x00\x01\x00\x00\x00\x00\x00\x00")
+                writer.close()
+                return
+            up_reader, up_writer = await asyncio.open_connection(host, port, local_addr=(ip, 0))
+            writer.write(b"\x05\x00\x00\x01" + socket.inet_aton(ip) + b"\x00\x00")
+            await relay(reader, writer, up_reader, up_writer)
+        except (asyncio.IncompleteReadError, ValueError, ConnectionError, OSError):
+            writer.close()
+
+    async def _blackhole(self, reader, writer):
+        # Giữ kết nối cho đến khi client bỏ cuộc
+        try:
+            while await reader.read(65536):
+                pass
+        except ConnectionError:
+            pass
+        writer.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Run the fake proxy farm until interrupted")
+    parser.add_argument("--proxies", type=int, default=1000)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument("--write", default="farm_proxies.txt", help="Write the proxy list here")
+    args = parser.parse_args()
+    with Farm(args.proxies, args.mix) as farm:
+        with open(args.write, "w", encoding="utf-8") as f:
+            f.write("\n".join(p for p, _, _ in farm.proxies) + "\n")
+        print(f"judge:   {farm.judge_url}")
+        print(f"sources: {' '.join(farm.source_urls)}")
+        print(f"proxies: {args.write} {farm.expected()}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,287 @@
+"""Reproducible scrape/check benchmark against the local fake proxy farm
+
+Usage: python -m benchmarks.run [--proxies 2000] [--threads 100] [--timeout 3] [--fast-timeout 1]
+                                [--output bench_report.json] [--baseline old.json]
+
+Sampling: python -m benchmarks.run --clustered 0.9 --stages check_cli,check_sampled
+
+Each stage runs in a forked child so peak RSS is per stage. With --baseline the
+run exits 1 if any throughput/latency/memory metric regressed beyond --tolerance.
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import json
+import multiprocessing
+import platform
+import sys
+import time
+
+from benchmarks.farm import Farm, DEFAULT_MIX, parse_mix
+from daoproxy.counters import StatsAggregator
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Hướng của metric khi so sánh với baseline
+HIGHER_IS_BETTER = ("_per_s",)
+LOWER_IS_BETTER = ("_ms", "_mb", "elapsed_s")
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả về KB, macOS trả về bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_stage(func, *args):
+    """Run func(*args) in a forked child, returns its result dict plus peak RSS"""
+    def child(conn):
+        start_rss = peak_rss_mb()
+        result = func(*args)
+        result["rss_peak_mb"] = peak_rss_mb()
+        if start_rss is not None:
+            result["rss_growth_mb"] = round(result["rss_peak_mb"] - start_rss, 1)
+        conn.send(result)
+        conn.close()
+
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return func(*args)
+    parent_conn, child_conn = multiprocessing.get_context("fork").Pipe(duplex=False)
+    process = multiprocessing.get_context("fork").Process(target=child, args=(child_conn,))
+    process.start()
+    result = parent_conn.recv()
+    process.join()
+    return result
+
+
+def latency_fields(aggregator, name="check"):
+    points = aggregator.percentiles(name)
+    return {f"p{p}_ms": v for p, v in points.items()}
+
+
+# ----- stages -----
+
+def scrape_cli(farm):
+    import Dao
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        proxy_sources = Dao.scrape_proxies(farm.source_urls)
+        elapsed = time.perf_counter() - start
+    lines = sum(body.count(b"\n") + 1 for body in farm.sources.values())
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "lines_per_s": round(lines / elapsed),
+        "unique": len(proxy_sources),
+    }
+
+
+def scrape_gui(farm):
+    import proxy_master
+    thread = proxy_master.ProxyScrapeThread(farm.source_urls)
+    start = time.perf_counter()
+    thread.run()
+    elapsed = time.perf_counter() - start
+    lines = sum(body.count(b"\n") + 1 for body in farm.sources.values())
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "lines_per_s": round(lines / elapsed),
+        "unique": len(thread.proxies),
+    }
+
+
+def check_cli(farm, threads, timeout):
+    import checker
+    checker.JUDGE_URL = farm.judge_url
+    timings = StatsAggregator((), histograms=("check",))
+    proxies = [p for p, _, _ in farm.proxies]
+
+    def timed_check(proxy):
+        start = time.perf_counter()
+        result = checker.get_proxy_info(proxy, timeout)
+        timings.observe("check", (time.perf_counter() - start) * 1000)
+        return result
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        live = sum(1 for r in executor.map(timed_check, proxies) if r)
+    elapsed = time.perf_counter() - start
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "checks_per_s": round(len(proxies) / elapsed, 1),
+        "live": live,
+        **latency_fields(timings),
+    }
+
+
+def check_lanes(farm, threads, timeout, fast_timeout):
+    """check_many with the fast lane; compare elapsed_s / live with check_cli (single pass)"""
+    from daoproxy.check import check_many
+    proxies = [p for p, _, _ in farm.proxies]
+    start = time.perf_counter()
+    live = check_many(proxies, timeout, threads, judge_url=farm.judge_url, fast_timeout=fast_timeout)
+    elapsed = time.perf_counter() - start
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "checks_per_s": round(len(proxies) / elapsed, 1),
+        "live": len(live),
+        "live_slow_lane": sum(1 for r in live if r["lane"] == "slow"),
+    }
+
+
+def check_sampled(farm, threads, timeout, sample):
+    """GroupSampler in front of the checks; compare checked / live with check_cli (every proxy)"""
+    from daoproxy.check import check_proxy
+    from daoproxy.sampling import GroupSampler
+    proxies = [p for p, _, _ in farm.proxies]
+    futures = []
+    live = []
+
+    def run(proxy):
+        result = check_proxy(proxy, timeout, judge_url=farm.judge_url)
+        if result:
+            live.append(result)
+        sampler.record(proxy, result is not None)
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        sampler = GroupSampler(proxies, lambda batch: futures.extend([executor.submit(run, p) for p in batch]), sample)
+        sampler.submit(sampler.start())
+        drained = 0
+        while drained < len(futures):
+            batch = futures[drained:]
+            drained += len(batch)
+            concurrent.futures.wait(batch)
+    elapsed = time.perf_counter() - start
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "checks_per_s": round(len(futures) / elapsed, 1),
+        "checked": len(futures),
+        "live": len(live),
+        "skipped": sampler.skipped,
+    }
+
+
+def check_gui(farm, timeout, protocol):
+    import proxy_master
+    proxy_master.JUDGE_URL = farm.judge_url
+    proxies = [p for p, _, _ in farm.proxies]
+    thread = proxy_master.ProxyCheckThread(proxies, timeout, protocol)
+    start = time.perf_counter()
+    thread.run()
+    elapsed = time.perf_counter() - start
+    pings = StatsAggregator((), histograms=("live",))
+    for result in thread.live_proxies:
+        pings.observe("live", result["ping"])
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "checks_per_s": round(len(proxies) / elapsed, 1),
+        "live": len(thread.live_proxies),
+        **{f"live_{k}": v for k, v in latency_fields(pings, "live").items()},
+    }
+
+
+# ----- report -----
+
+def compare(results, baseline, tolerance):
+    """List of (stage, metric, old, new) that regressed more than tolerance"""
+    regressions = []
+    for stage, metrics in results.items():
+        for metric, new in metrics.items():
+            old = baseline.get(stage, {}).get(metric)
+            if not isinstance(new, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            if metric.endswith(HIGHER_IS_BETTER) and new < old * (1 - tolerance):
+                regressions.append((stage, metric, old, new))
+            elif metric.endswith(LOWER_IS_BETTER) and new > old * (1 + tolerance):
+                regressions.append((stage, metric, old, new))
+    return regressions
+
+
+def print_report(report):
+    print(f"\nFarm: {report['farm']['expected']}")
+    for stage, metrics in report["results"].items():
+        fields = "  ".join(f"{k}={v}" for k, v in metrics.items())
+        print(f"{stage:<16} {fields}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scrape/check engines against a local proxy farm")
+    parser.add_argument("--proxies", type=int, default=2000, help="Fake proxies in the farm (default: 2000)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Behaviour shares, e.g. alive=0.2,slow=0.05,socks=0.1,dead=0.35,filtered=0.15,blackhole=0.15")
+    parser.add_argument("--slow-delay", type=float, default=1.5, help="Delay of slow proxies (default: 1.5s)")
+    parser.add_argument("--sources", type=int, default=10, help="Source lists served (default: 10)")
+    parser.add_argument("--threads", type=int, default=100, help="CLI check threads (default: 100)")
+    parser.add_argument("--timeout", type=int, default=3, help="Check timeout (default: 3s)")
+    parser.add_argument("--fast-timeout", type=float, default=1, help="Fast-lane timeout for check_lanes (default: 1s)")
+    parser.add_argument("--clustered", type=float, default=0.0,
+                        help="Chance a proxy shares the behaviour of the first proxy on its IP (default: 0)")
+    parser.add_argument("--sample", type=int, default=4, help="Sample size for check_sampled (default: 4)")
+    parser.add_argument("--stages", default="scrape_cli,scrape_gui,check_cli,check_lanes,check_gui",
+                        help="Comma separated stages to run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="bench_report.json", help="Report file (default: bench_report.json)")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed regression (default: 0.15)")
+    args = parser.parse_args()
+
+    stages = args.stages.split(",")
+    try:
+        import PyQt5  # noqa: F401
+    except ImportError:
+        gui = [s for s in stages if s.endswith("_gui")]
+        if gui:
+            print(f"PyQt5 not installed, skipping {', '.join(gui)}")
+        stages = [s for s in stages if not s.endswith("_gui")]
+
+    print(f"Starting farm with {args.proxies} proxies...")
+    with Farm(args.proxies, args.mix, args.slow_delay, args.sources, seed=args.seed, clustered=args.clustered) as farm:
+        runners = {
+            "scrape_cli": (scrape_cli, farm),
+            "scrape_gui": (scrape_gui, farm),
+            "check_cli": (check_cli, farm, args.threads, args.timeout),
+            "check_lanes": (check_lanes, farm, args.threads, args.timeout, args.fast_timeout),
+            "check_sampled": (check_sampled, farm, args.threads, args.timeout, args.sample),
+            "check_gui": (check_gui, farm, args.timeout, "HTTP"),
+        }
+        results = {}
+        for stage in stages:
+            print(f"  {stage}...", flush=True)
+            func, *stage_args = runners[stage]
+            results[stage] = run_stage(func, *stage_args)
+        expected = farm.expected()
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        },
+        "farm": {"expected": expected},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"\nReport written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for stage, metric, old, new in regressions:
+            print(f"REGRESSION {stage}.{metric}: {old} -> {new}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
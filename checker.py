@@ -1,96 +1,162 @@
-import requests
-import concurrent.futures
 import time
 import argparse
 import os
+import json
 from rich.console import Console
 from rich.table import Table
 from rich.live import Live
 from rich.panel import Panel
+from rich.layout import Layout
 from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn
 import threading
+import multiprocessing
+from daoproxy.counters import StatsAggregator
+from daoproxy.metrics import metrics, instrument_requests
+from daoproxy.source_stats import SourceStats, load_proxy_sources, SOURCES_MAP_FILE
+from daoproxy.scheduler import load_previous_live, prioritize, PREVIOUS_LIVE_FILE
+from daoproxy.distributed import Coordinator, run_worker, DEFAULT_PORT, BATCH_SIZE
+from daoproxy.seen import SeenFilter, SEEN_FILE
+from daoproxy.check import (check_proxy, check_many, parse_profile, probe_judge, JUDGE_URL, ANONYMITY_LEVELS,
+                            FAST_TIMEOUT, SLOW_LANE_SHARE)
+from daoproxy.export import save_results, write_proxy_list, export_json
+from daoproxy.index import ResultIndex, parse_where
+from daoproxy.sampling import GroupSampler, SAMPLE_SIZE, asn_map_from
+from daoproxy.parse_pool import ParsePool, CHUNK_SIZE
+from daoproxy.ratelimit import limiter
+from daoproxy import dnscache
+from daoproxy import validate
 
 console = Console()
+REFRESH_SECONDS = 0.5  # Dựng lại layout tối đa 2 lần/giây (= refresh_per_second của Live), không phải mỗi proxy
 
-# Stats
-stats = {
-    "total": 0,
-    "checked": 0,
-    "live": 0,
-    "die": 0,
-    "start_time": time.time()
-}
-lock = threading.Lock()
+# Stats (per-thread shards, merged on read); "check" = every check, "live" = delay of live proxies
+stats = StatsAggregator(("checked", "live", "die"), histograms=("check", "live"))
+lock = threading.Lock()  # Guards source_stats and seen_filter
 
-# Results storage
+# Results storage (list.append is atomic, no lock needed)
 live_proxies = []
 
-def update_stat(key):
-    """Update statistics thread-safe"""
-    with lock:
-        stats[key] += 1
-        stats["checked"] += 1
+# Source attribution (proxy -> source urls), filled by main() when available
+proxy_sources = {}
+source_stats = None
+seen_filter = None  # Cross-run Bloom filter of checked proxies (--seen-filter)
+sampler = None  # GroupSampler of this run (--sample)
+PROFILES = []  # Extra verification stages after the judge (--verify)
+REAL_IP = None  # Our IP as the judge sees it, for transparent proxy detection
+MIN_ANONYMITY = None  # --min-anonymity
+worker_config = None  # Coordinator config configure_worker applied last
 
-def get_proxy_info(proxy, timeout=10):
-    """Check proxy and get detailed information"""
-    try:
-        proxies = {
-            "http": f"http://{proxy}",
-            "https": f"http://{proxy}"
-        }
-        
-        start_time = time.time()
-        response = requests.get(
-            "http://ip-api.com/json",
-            proxies=proxies,
-            timeout=timeout,
-            headers={"User-Agent": "Mozilla/5.0"}
-        )
-        delay = round((time.time() - start_time) * 1000)
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            # Determine protocol
-            port = proxy.split(":")[-1]
-            if port in ["1080", "1081"]:
-                protocol = "SOCKS5"
-            elif port in ["1082", "1083", "1085"]:
-                protocol = "SOCKS4"
-            elif port in ["443", "8443"]:
-                protocol = "HTTPS"
-            else:
-                protocol = "HTTP"
-            
-            result = {
-                "proxy": proxy,
-                "ip": proxy.split(":")[0],
-                "port": port,
-                "ipv": "IPV4",  # Default, could be enhanced
-                "protocol": protocol,
-                "country": data.get("country", "Unknown"),
-                "city": data.get("city", "Unknown"),
-                "isp": data.get("isp", "Unknown")[:20] + "...",
-                "org": data.get("org", "Unknown")[:15] + "...",
-                "asn": data.get("as", "Unknown")[:15] + "...",
-                "anonymity": "High" if data.get("proxy") == "true" else "Elite",
-                "delay": f"{delay}ms",
-                "working": "YES",
-                "status": "LIVE"
-            }
-            
-            update_stat("live")
+def record_source_check(proxy, alive, delay=None):
+    """Attribute a check result to the sources that listed the proxy"""
+    if source_stats is None:
+        return
+    sources = proxy_sources.get(proxy)
+    if sources:
+        with lock:
+            source_stats.record_check(sources, alive, delay)
+
+def mark_seen(proxy):
+    """Remember that proxy was checked, for later runs"""
+    if seen_filter is not None:
+        with lock:
+            seen_filter.add(proxy)
+
+def record_sample(proxy, alive):
+    """Let the sampler expand or skip the rest of proxy's IP / subnet group"""
+    if sampler is not None:
+        skipped = sampler.record(proxy, alive)
+        if skipped:
             with lock:
-                live_proxies.append(result)
-            
-            return result
-        else:
-            update_stat("die")
-            return None
-            
-    except Exception as e:
-        update_stat("die")
+                stats.total -= skipped
+
+def update_stat(key, check_ms=None):
+    """Update statistics (thread-local shard, no lock)"""
+    stats.incr(key)
+    stats.incr("checked")
+    if check_ms is not None:
+        stats.observe("check", check_ms)
+
+def get_proxy_info(proxy, timeout=10, lane=None, requeue=None):
+    """Check proxy and get detailed information
+
+    In the fast lane (requeue set) a proxy that connected but timed out is handed to requeue, not counted dead.
+    """
+    start_time = time.time()
+    timed_out = []
+    info = check_proxy(proxy, timeout, judge_url=JUDGE_URL, profiles=PROFILES, real_ip=REAL_IP,
+                       min_anonymity=MIN_ANONYMITY, lane=lane, requeue=timed_out.append if requeue else None)
+    if timed_out:
+        requeue(proxy)
         return None
+    check_ms = (time.time() - start_time) * 1000
+    mark_seen(proxy)
+    
+    if info is None:
+        record_source_check(proxy, False)
+        update_stat("die", check_ms)
+        record_sample(proxy, False)
+        return None
+    
+    result = {
+        "proxy": proxy,
+        "ip": info["host"],
+        "port": info["port"],
+        "ipv": info["ipv"],
+        "protocol": info["protocol"],
+        "country": info["country"],
+        "city": info["city"],
+        "isp": info["isp"][:20] + "...",
+        "org": info["org"][:15] + "...",
+        "asn": info["asn"][:15] + "...",
+        "anonymity": info["anonymity"],
+        "delay": f"{info['ping']}ms",
+        "ping": info["ping"],
+        "profiles": info["profiles"],
+        "lane": info["lane"],
+        "working": "YES",
+        "status": "LIVE",
+        "sources": len(proxy_sources.get(proxy, ()))
+    }
+    
+    record_source_check(proxy, True, info["ping"])
+    update_stat("live", check_ms)
+    stats.observe("live", info["ping"])
+    live_proxies.append(result)
+    record_sample(proxy, True)
+    return result
+
+def record_remote_result(proxy, result):
+    """Account a result checked by a distributed worker"""
+    mark_seen(proxy)
+    if result:
+        delay = int(result["delay"].rstrip("ms"))
+        record_source_check(proxy, True, delay)
+        update_stat("live")
+        stats.observe("live", delay)
+        live_proxies.append(result)
+    else:
+        record_source_check(proxy, False)
+        update_stat("die")
+    record_sample(proxy, bool(result))
+
+def configure_worker(config):
+    """Apply the coordinator's check settings in a worker, again only if they changed since the last batch"""
+    global JUDGE_URL, PROFILES, REAL_IP, MIN_ANONYMITY, worker_config
+    if config == worker_config:
+        return
+    if worker_config is None or config.get("judge", JUDGE_URL) != JUDGE_URL:
+        # Mỗi worker có IP riêng, chỉ hỏi judge một lần (kể cả khi không trả lời: REAL_IP None)
+        REAL_IP = probe_judge(config.get("judge", JUDGE_URL), config.get("timeout", 10))[0]
+    worker_config = config
+    JUDGE_URL = config.get("judge", JUDGE_URL)
+    PROFILES = [parse_profile(spec) for spec in config.get("profiles", ())]
+    MIN_ANONYMITY = config.get("min_anonymity")
+    limiter.set_limit(JUDGE_URL, config.get("judge_rate"))
+    dnscache.install(dnscache.hosts_of([JUDGE_URL] + [p.url for p in PROFILES]))
+
+def worker_process(url, threads, token=None):
+    """Entry point for local worker processes"""
+    return run_worker(url, get_proxy_info, threads, token, configure_worker)
 
 def create_results_table():
     """Create rich table with results"""
@@ -144,69 +210,157 @@ def get_flag(country):
     }
     return flags.get(country, "🌍")
 
-def create_stats_panel():
+def format_percentiles(points):
+    """{50: 120, 90: 800, 99: 4000} -> '120/800/4000ms'"""
+    return "/".join("-" if v is None else str(v) for v in points.values()) + "ms"
+
+def create_stats_panel(subtitle=None):
     """Create statistics panel"""
-    elapsed = time.time() - stats["start_time"]
-    cpm = int(stats["checked"] / elapsed * 60) if elapsed > 0 else 0
+    snap = stats.snapshot()
     
     stats_text = f"""
-[cyan]Total:[/cyan] [white]{stats['total']}[/white]  |  [cyan]Checked:[/cyan] [yellow]{stats['checked']}/{stats['total']}[/yellow]
-[green]✓ Live:[/green] [green]{stats['live']}[/green]  |  [red]✗ Die:[/red] [red]{stats['die']}[/red]
-[cyan]Speed:[/cyan] [yellow]{cpm} CPM[/yellow]  |  [cyan]Time:[/cyan] [white]{int(elapsed)}s[/white]
+[cyan]Total:[/cyan] [white]{snap['total']}[/white]  |  [cyan]Checked:[/cyan] [yellow]{snap['checked']}/{snap['total']}[/yellow]
+[green]✓ Live:[/green] [green]{snap['live']}[/green]  |  [red]✗ Die:[/red] [red]{snap['die']}[/red]
+[cyan]Speed:[/cyan] [yellow]{snap['cpm']} CPM[/yellow]  |  [cyan]Time:[/cyan] [white]{int(snap['elapsed'])}s[/white]
+[cyan]p50/p90/p99:[/cyan] [white]check {format_percentiles(stats.percentiles('check'))}[/white]  |  [green]live {format_percentiles(stats.percentiles('live'))}[/green]
     """
-    return Panel(stats_text, title="[bold cyan]Statistics[/bold cyan]", border_style="cyan")
+    return Panel(stats_text, title="[bold cyan]Statistics[/bold cyan]", subtitle=subtitle, border_style="cyan")
+
+def create_layout(subtitle=None):
+    """Stats panel on top of the latest results"""
+    layout = Layout()
+    layout.split_column(
+        Layout(create_stats_panel(subtitle), size=6),
+        Layout(create_results_table())
+    )
+    return layout
 
-def load_proxies(file_path):
+def load_proxies(file_path, pool=None):
     """Load proxies from file"""
-    proxies = []
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if line and ":" in line:
-                    parts = line.split(":")
-                    if len(parts) >= 2 and parts[1].isdigit():
-                        proxies.append(line)
-        return proxies
+        return validate.load_proxies(file_path, pool)
     except Exception as e:
         console.print(f"[red][!] Error loading file: {e}[/red]")
         return []
 
-def save_results(live_proxies):
-    """Save live proxies to files"""
-    # Save all live proxies
-    with open("live_proxies.txt", "w", encoding="utf-8") as f:
-        for proxy in live_proxies:
-            f.write(f"{proxy['proxy']}\n")
-    
-    # Save by protocol
-    protocols = {}
-    for proxy in live_proxies:
-        proto = proxy["protocol"].lower()
-        if proto not in protocols:
-            protocols[proto] = []
-        protocols[proto].append(proxy["proxy"])
-    
-    for proto, proxies in protocols.items():
-        with open(f"live_{proto}.txt", "w", encoding="utf-8") as f:
-            for proxy in proxies:
-                f.write(f"{proxy}\n")
-    
-    # Save by country
-    countries = {}
-    for proxy in live_proxies:
-        country = proxy["country"]
-        if country not in countries:
-            countries[country] = []
-        countries[country].append(proxy["proxy"])
-    
-    for country, proxies in countries.items():
-        safe_country = country.replace(" ", "_")
-        with open(f"live_{safe_country}.txt", "w", encoding="utf-8") as f:
-            for proxy in proxies:
-                f.write(f"{proxy}\n")
+def stream_proxies(file_path, pool):
+    """(first batch, iterator of the rest) of a big file, ([], None) on error"""
+    try:
+        batches = validate.iter_proxies(file_path, pool)
+        return next(batches, []), batches
+    except Exception as e:
+        console.print(f"[red][!] Error loading file: {e}[/red]")
+        return [], None
+
+def prepare_batch(batch, args, previous_live):
+    """Seen filter / priority / sampling for a batch streamed in after the check started -> proxies to submit"""
+    with lock:
+        if args.new_only:
+            batch = seen_filter.split_new(batch)[0]
+        if not args.no_priority:
+            batch = prioritize(batch, previous_live, proxy_sources, source_stats, seen_filter)
+        stats.total += len(batch)
+    if sampler is not None:
+        batch, skipped = sampler.add(batch)
+        if skipped:
+            with lock:
+                stats.total -= skipped
+    return batch
+
+def run_local(args, proxy_list, live, more=None):
+    """Check proxy_list in this process (check_many's fast + slow lane), returns stop time if --stop-after hit
+
+    Waves released by the sampler join the check while it runs, so do the lists of more
+    (an iterable, read while the input file is still parsed).
+    """
+    stop = threading.Event()
+    stopped_at = []
+    next_refresh = [0]
+    
+    def on_result(proxy, result):
+        if stop.is_set() and not stopped_at:
+            stopped_at.append(stats.elapsed())
+        # Update display
+        if time.monotonic() >= next_refresh[0]:
+            next_refresh[0] = time.monotonic() + REFRESH_SECONDS
+            live.update(create_layout())
+    
+    def feed(submit):
+        # sampler.submit trước lô đầu: check đầu tiên đã có thể mở thêm wave
+        if sampler is not None:
+            sampler.submit = submit
+        submit(proxy_list)
+        try:
+            for batch in more or ():
+                if stop.is_set():
+                    break
+                submit(batch)
+        except Exception as e:
+            console.print(f"[red][!] Error loading file: {e}[/red]")
+    
+    check_many((), args.timeout, args.threads, on_result=on_result, stop_after=args.stop_after,
+               stop=stop, fast_timeout=args.fast_timeout, check=get_proxy_info, feed=feed)
+    live.update(create_layout())
+    return stopped_at[0] if stopped_at else None
+
+def run_query(query, results, output):
+    """Filter results through a ResultIndex, write the matches (fastest first) to output"""
+    index = ResultIndex(results)
+    start = time.perf_counter()
+    matches = index.query(**query)
+    query_ms = (time.perf_counter() - start) * 1000
+    if output.endswith(".json"):
+        export_json(matches, output)
+    else:
+        write_proxy_list((p["proxy"] for p in matches), output)
+    console.print(f"[green][✓] Query: {len(matches)}/{len(results)} results match "
+                  f"({query_ms:.1f}ms) -> {output}[/green]")
+    return matches
+
+def run_coordinator(args, proxy_list, live):
+    """Shard proxy_list across worker processes / hosts, returns stop time if --stop-after hit"""
+    host, _, port = (args.serve or f"127.0.0.1:{DEFAULT_PORT}").rpartition(":")
+    coordinator = Coordinator([], record_remote_result, args.batch_size,
+                              config={"timeout": args.timeout, "judge": JUDGE_URL,
+                                      "profiles": [p.spec() for p in PROFILES], "min_anonymity": MIN_ANONYMITY,
+                                      "judge_rate": args.judge_rate, "fast_timeout": args.fast_timeout}, token=args.token)
+    if sampler is not None:
+        sampler.submit = coordinator.add
+    coordinator.add(proxy_list)
+    host, port = coordinator.serve(host or "0.0.0.0", int(port))
+    local_url = f"http://{'127.0.0.1' if host == '0.0.0.0' else host}:{port}"
+    
+    # spawn: Live / metrics / DNS prefetch thread đang chạy, và worker không được thừa hưởng
+    # seen_filter (mmap) hay sampler của coordinator
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=worker_process, args=(local_url, args.threads, args.token), daemon=True)
+        for _ in range(args.local_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    
+    stopped_at = None
+    while not coordinator.finished():
+        status = coordinator.status()
+        live.update(create_layout(
+            f"[white]{host}:{port} | workers {status['workers']} | "
+            f"batches {status['completed']}/{status['batches']} | reassigned {status['reassigned']}[/white]"
+        ))
+        if args.stop_after and stats.counts()["live"] >= args.stop_after:
+            stopped_at = stats.elapsed()
+            coordinator.stop()
+        time.sleep(0.5)
+    live.update(create_layout())
+    
+    # Giữ server thêm một lúc để worker nhận lệnh "done" và thoát
+    for worker in workers:
+        worker.join(timeout=args.timeout + 5)
+    coordinator.shutdown()
+    return stopped_at
 
 def main():
+    global proxy_sources, source_stats, seen_filter, sampler, JUDGE_URL, PROFILES, REAL_IP, MIN_ANONYMITY
     os.system("cls" if os.name == "nt" else "clear")
     
     # Banner
@@ -224,59 +378,243 @@ def main():
     
     # Arguments
     parser = argparse.ArgumentParser(description="Advanced Proxy Checker")
-    parser.add_argument("--file", "-f", required=True, help="Input proxy file")
+    parser.add_argument("--file", "-f", help="Input proxy file")
     parser.add_argument("--threads", "-t", type=int, default=100, help="Threads (default: 100)")
     parser.add_argument("--timeout", type=int, default=10, help="Timeout (default: 10s)")
+    parser.add_argument("--fast-timeout", type=int, default=FAST_TIMEOUT,
+                        help=f"First-pass timeout; only proxies that connect but time out are retried with --timeout "
+                             f"(1/{SLOW_LANE_SHARE} of the threads until the first pass ends) "
+                             f"(default: {FAST_TIMEOUT}s, 0 = single pass)")
+    parser.add_argument("--sources-map", default=SOURCES_MAP_FILE,
+                        help=f"Proxy -> source attribution from Dao.py (default: {SOURCES_MAP_FILE})")
+    parser.add_argument("--prev-live", default=PREVIOUS_LIVE_FILE,
+                        help=f"Live proxies from the previous run, checked first (default: {PREVIOUS_LIVE_FILE})")
+    parser.add_argument("--no-priority", action="store_true", help="Check in file order instead of by prior score")
+    parser.add_argument("--stop-after", type=int, default=0, help="Stop once N live proxies are found (default: 0 = check all)")
+    parser.add_argument("--seen-filter", nargs="?", const=SEEN_FILE, metavar="FILE",
+                        help=f"Record checked proxies across runs and check unseen ones first (default: {SEEN_FILE})")
+    parser.add_argument("--new-only", action="store_true", help="Only check proxies never checked before (implies --seen-filter)")
+    parser.add_argument("--sample", type=int, nargs="?", const=SAMPLE_SIZE, default=0, metavar="N",
+                        help=f"Check N proxies of every IP / subnet group first, skip the rest of all-dead groups; "
+                             f"live proxies in skipped groups are missed (N default: {SAMPLE_SIZE}, off unless given)")
+    parser.add_argument("--asn-history", metavar="JSON",
+                        help="Results JSON of an earlier run (e.g. --query-output live.json): sample /24s "
+                             "of one ASN as a single group")
+    parser.add_argument("--judge", default=JUDGE_URL, help=f"Judge URL returning ip-api style JSON (default: {JUDGE_URL})")
+    parser.add_argument("--verify", action="append", default=[], metavar="PROFILE", type=parse_profile,
+                        help="Extra check after the judge, in order: 'https' (CONNECT tunnel) or "
+                             "'name=URL[|status[|body text]]'; repeatable")
+    parser.add_argument("--min-anonymity", choices=ANONYMITY_LEVELS,
+                        help="Only count proxies at least this anonymous as live (needs a judge that echoes headers)")
+    parser.add_argument("--judge-rate", type=float, default=0,
+                        help="Max judge requests/s per process, e.g. for a self-hosted judge (default: 0 = unlimited)")
+    # Distributed mode
+    parser.add_argument("--serve", metavar="HOST:PORT",
+                        help=f"Run as coordinator, workers pull batches from here (e.g. 0.0.0.0:{DEFAULT_PORT})")
+    parser.add_argument("--local-workers", type=int, default=0,
+                        help="Spawn N local worker processes (implies coordinator mode)")
+    parser.add_argument("--worker", metavar="URL", help="Run as worker for the coordinator at URL")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"Proxies per batch (default: {BATCH_SIZE})")
+    parser.add_argument("--token", help="Shared secret between coordinator and workers")
+    # Query
+    parser.add_argument("--where", action="append", default=[], metavar="KEY=VALUE",
+                        help="Filter live results into --query-output: country=, protocol=, asn= (comma = any of), "
+                             "anonymity= (minimum), max_ping=; repeatable, all must match")
+    parser.add_argument("--query-output", default="live_query.txt",
+                        help="File for --where matches, fastest first; .json keeps full records (default: live_query.txt)")
+    parser.add_argument("--results", metavar="JSON",
+                        help="Query a saved JSON results file with --where instead of checking")
+    # Instrumentation
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="Serve Prometheus /metrics and JSON /summary on 127.0.0.1:PORT (default: off)")
+    parser.add_argument("--metrics-json", help="Write an end-of-run timing summary (JSON) to this file")
     args = parser.parse_args()
+    try:
+        query = parse_where(args.where)
+    except ValueError as e:
+        parser.error(str(e))
+    JUDGE_URL = args.judge
+    PROFILES = args.verify
+    MIN_ANONYMITY = args.min_anonymity
+    limiter.set_limit(JUDGE_URL, args.judge_rate)
     
-    # Load proxies
+    instrument_requests()
+    # Judge / profile hosts (SOCKS5 resolves them locally on every check)
+    dnscache.install(dnscache.hosts_of([JUDGE_URL] + [p.url for p in PROFILES]))
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+        console.print(f"[cyan][*] Metrics on http://127.0.0.1:{args.metrics_port}/metrics[/cyan]")
+    
+    if args.worker:
+        console.print(f"[cyan][*] Worker for {args.worker} with {args.threads} threads...[/cyan]")
+        checked = run_worker(args.worker, get_proxy_info, args.threads, args.token, configure_worker)
+        console.print(f"[green][✓] Worker done, checked {checked} proxies[/green]")
+        return
+    if args.results:
+        with open(args.results, "r", encoding="utf-8") as f:
+            run_query(query, json.load(f), args.query_output)
+        return
+    if not args.file:
+        parser.error("--file is required (except in --worker / --results mode)")
+    
+    # Our own IP lets the judge's echo reveal transparent proxies
+    REAL_IP, echoes_headers = probe_judge(JUDGE_URL, args.timeout)
+    if REAL_IP is None:
+        console.print("[yellow][!] Judge not reachable directly, transparent proxies can't be detected[/yellow]")
+    if not echoes_headers:
+        console.print("[yellow][!] Judge does not echo headers, Anonymous/Elite show as Unknown "
+                      "(self-host one with: python -m daoproxy judge)[/yellow]")
+    
+    # Load proxies. A big file is parsed in chunks (process pool) and checking starts with the
+    # first chunk; coordinator mode shards the whole list, so it still loads everything first
+    distributed = bool(args.serve or args.local_workers)
     console.print(f"[cyan][*] Loading proxies from {args.file}...[/cyan]")
-    proxy_list = load_proxies(args.file)
+    pool = ParsePool()
+    batches = None
+    if not distributed and os.path.isfile(args.file) and os.path.getsize(args.file) > CHUNK_SIZE:
+        proxy_list, batches = stream_proxies(args.file, pool)
+    else:
+        proxy_list = load_proxies(args.file, pool)
     
     if not proxy_list:
         console.print("[red][!] No valid proxies found![/red]")
+        pool.close()
         return
     
-    stats["total"] = len(proxy_list)
-    console.print(f"[green][✓] Loaded {len(proxy_list)} proxies[/green]\n")
+    if batches is None:
+        console.print(f"[green][✓] Loaded {len(proxy_list)} proxies[/green]\n")
+    else:
+        console.print(f"[green][✓] Loaded {len(proxy_list)} proxies, reading the rest of the file while checking[/green]\n")
+    
+    # Proxies already checked by earlier runs
+    if args.seen_filter or args.new_only:
+        seen_filter = SeenFilter(args.seen_filter or SEEN_FILE)
+        new, seen = seen_filter.split_new(proxy_list)
+        console.print(f"[cyan][*] Seen filter: {len(new)} new, {len(seen)} checked in earlier runs[/cyan]")
+        if args.new_only:
+            proxy_list = new
+            if not proxy_list and batches is None:
+                console.print("[yellow][!] No new proxies to check[/yellow]")
+                seen_filter.close()
+                pool.close()
+                return
+    stats.total = len(proxy_list)
+    
+    # Per-source quality tracking
+    proxy_sources = load_proxy_sources(args.sources_map)
+    source_stats = SourceStats()
+    if proxy_sources:
+        console.print(f"[cyan][*] Tracking source quality for {len(proxy_sources)} attributed proxies[/cyan]")
+    
+    # Check the most likely live proxies first
+    previous_live = ()
+    if not args.no_priority:
+        previous_live = load_previous_live(args.prev_live)
+        proxy_list = prioritize(proxy_list, previous_live, proxy_sources, source_stats, seen_filter)
+        console.print(f"[cyan][*] Priority order: {len(previous_live)} previously live, "
+                      f"{len(proxy_sources)} with source info[/cyan]")
+    
+    # Check a sample of every IP / subnet / ASN group first
+    if args.sample > 0:
+        asn_map = {}
+        if args.asn_history:
+            try:
+                with open(args.asn_history, "r", encoding="utf-8") as f:
+                    asn_map = asn_map_from(json.load(f))
+            except (OSError, ValueError) as e:
+                console.print(f"[yellow][!] ASN history not loaded: {e}[/yellow]")
+        sampler = GroupSampler(proxy_list, None, args.sample, asn_map=asn_map)
+        proxy_list = sampler.start()
+        groups = sampler.stats()
+        console.print(f"[cyan][*] Sampling: {groups['groups']} groups ({groups['grouped']} proxies) start with "
+                      f"{args.sample} each, {len(proxy_list)} proxies in the first wave[/cyan]")
+    console.print()
     
     # Start checking
-    console.print(f"[cyan][*] Starting check with {args.threads} threads...[/cyan]\n")
+    if distributed:
+        console.print(f"[cyan][*] Coordinator mode: {args.local_workers} local workers x {args.threads} threads, "
+                      f"batches of {args.batch_size}...[/cyan]\n")
+    else:
+        console.print(f"[cyan][*] Starting check with {args.threads} threads...[/cyan]\n")
     
+    stopped_at = None
+    stats.start()
     with Live(console=console, refresh_per_second=2) as live:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=args.threads) as executor:
-            futures = [executor.submit(get_proxy_info, proxy, args.timeout) for proxy in proxy_list]
-            
-            for future in concurrent.futures.as_completed(futures):
-                # Update display
-                table = create_results_table()
-                stats_panel = create_stats_panel()
-                
-                from rich.layout import Layout
-                layout = Layout()
-                layout.split_column(
-                    Layout(stats_panel, size=5),
-                    Layout(table)
-                )
-                live.update(layout)
+        if distributed:
+            stopped_at = run_coordinator(args, proxy_list, live)
+        else:
+            more = None
+            if batches is not None:
+                more = (prepare_batch(batch, args, previous_live) for batch in batches)
+            stopped_at = run_local(args, proxy_list, live, more)
+    
+    stats.stop()
+    pool.close()
     
     # Final results
+    snap = stats.snapshot()
     console.print("\n" + "="*60)
     console.print(f"[green]✅ DONE![/green]")
-    console.print(f"[cyan]Total Checked:[/cyan] [yellow]{stats['checked']}[/yellow]")
-    console.print(f"[green]✓ Live:[/green] [green]{stats['live']}[/green]")
-    console.print(f"[red]✗ Die:[/red] [red]{stats['die']}[/red]")
-    console.print(f"[cyan]Success Rate:[/cyan] [yellow]{round(stats['live']/stats['total']*100, 2)}%[/yellow]")
+    console.print(f"[cyan]Total Checked:[/cyan] [yellow]{snap['checked']}[/yellow]")
+    console.print(f"[green]✓ Live:[/green] [green]{snap['live']}[/green]")
+    console.print(f"[red]✗ Die:[/red] [red]{snap['die']}[/red]")
+    console.print(f"[cyan]Success Rate:[/cyan] [yellow]{round(snap['live']/max(snap['checked'], 1)*100, 2)}%[/yellow]")
+    console.print(f"[cyan]Speed:[/cyan] [yellow]{snap['cpm']} CPM[/yellow] in [white]{round(snap['elapsed'], 1)}s[/white]")
+    console.print(f"[cyan]Latency p50/p90/p99:[/cyan] check [white]{format_percentiles(stats.percentiles('check'))}[/white], "
+                  f"live [green]{format_percentiles(stats.percentiles('live'))}[/green]")
+    if live_proxies:
+        levels = {}
+        for r in live_proxies:
+            levels[r["anonymity"]] = levels.get(r["anonymity"], 0) + 1
+        order = ANONYMITY_LEVELS[::-1] + ("Unknown",)
+        breakdown = " | ".join(f"{level} {levels[level]}" for level in order if level in levels)
+        console.print(f"[cyan]Anonymity:[/cyan] [white]{breakdown}[/white]")
+        slow = sum(1 for r in live_proxies if r["lane"] == "slow")
+        if any(r["lane"] for r in live_proxies):
+            console.print(f"[cyan]Live by lane:[/cyan] [white]fast {len(live_proxies) - slow} | slow {slow}[/white]")
+    if PROFILES and live_proxies:
+        medians = []
+        for name in ["http"] + [p.name for p in PROFILES]:
+            values = sorted(r["profiles"][name] for r in live_proxies)
+            medians.append(f"{name} {values[len(values) // 2]}ms")
+        console.print(f"[cyan]Verification (median per profile, live only):[/cyan] [white]{' | '.join(medians)}[/white]")
+    if sampler is not None:
+        groups = sampler.stats()
+        console.print(f"[cyan]Sampling:[/cyan] [white]skipped {groups['skipped']} proxies in "
+                      f"{groups['skipped_groups']}/{groups['groups']} all-dead groups[/white]")
+    dns = dnscache.dns_cache.stats()
+    if dns["hit_rate"] is not None:
+        console.print(f"[cyan]DNS cache:[/cyan] [white]{dns['hit_rate'] * 100:.1f}% hit "
+                      f"({dns['hits']}/{dns['hits'] + dns['misses']} lookups)[/white]")
+    if stopped_at is not None:
+        console.print(f"[cyan]Stopped after {args.stop_after} live in:[/cyan] [yellow]{round(stopped_at, 1)}s[/yellow] "
+                      f"[white]({snap['total'] - snap['checked']} not checked)[/white]")
     console.print("="*60 + "\n")
     
+    if proxy_sources:
+        source_stats.save()
+        console.print("[green][✓] Source stats updated (python Dao.py --source-report)[/green]")
+    if seen_filter is not None:
+        seen_filter.close()
+    
     # Save results
     if live_proxies:
         console.print("[cyan][*] Saving results...[/cyan]")
-        save_results(live_proxies)
+        with metrics.timer("export"):
+            save_results(live_proxies)
+        metrics.incr("exported", len(live_proxies))
         console.print("[green][✓] Results saved:[/green]")
         console.print("  • live_proxies.txt (all)")
         console.print("  • live_http.txt, live_https.txt, live_socks4.txt, live_socks5.txt")
+        console.print("  • live_elite.txt, live_anonymous.txt, live_transparent.txt")
         console.print("  • live_[Country].txt")
+        if args.where:
+            run_query(query, live_proxies, args.query_output)
+    
+    if args.metrics_json:
+        metrics.stop()
+        metrics.write_summary(args.metrics_json)
+        console.print(f"[green][✓] Timing summary written to {args.metrics_json}[/green]")
     
     console.print("\n[cyan]Thank you for using! 🚀[/cyan]")
 
@@ -0,0 +1,55 @@
+"""Headless scrape / validate / check / export engine behind Dao.py, checker.py and the GUI
+
+    from daoproxy import RAW_PROXY_SITES, scrape_sources, check_many
+    proxy_sources = scrape_sources(RAW_PROXY_SITES)
+    live = check_many(proxy_sources, timeout=5)
+
+Names are resolved on first access so `import daoproxy` pulls in nothing heavy;
+requests is only imported once something is fetched or checked.
+"""
+
+_EXPORTS = {
+    "RAW_PROXY_SITES": "sources",
+    "scrape_sources": "scrape",
+    "fetch_source": "scrape",
+    "is_valid_proxy": "validate",
+    "guess_protocol": "validate",
+    "load_proxies": "validate",
+    "check_proxy": "check",
+    "check_many": "check",
+    "classify_anonymity": "check",
+    "probe_judge": "check",
+    "JUDGE_URL": "check",
+    "save_results": "export",
+    "write_proxy_list": "export",
+    "export_txt": "export",
+    "export_json": "export",
+    "export_csv": "export",
+    "SourceStats": "source_stats",
+    "load_proxy_sources": "source_stats",
+    "save_proxy_sources": "source_stats",
+    "prioritize": "scheduler",
+    "load_previous_live": "scheduler",
+    "SeenFilter": "seen",
+    "ParsePool": "parse_pool",
+    "StatsAggregator": "counters",
+    "RateLimiter": "ratelimit",
+    "DnsCache": "dnscache",
+    "ResultIndex": "index",
+    "GroupSampler": "sampling",
+    "Coordinator": "distributed",
+    "run_worker": "distributed",
+    "Service": "service",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
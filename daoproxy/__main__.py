@@ -0,0 +1,199 @@
+"""Lean CLI for cron / scripts: plain output, no rich, no Qt
+
+    python -m daoproxy scrape [-o proxy.txt] [--auto-tune]
+    python -m daoproxy check proxy.txt [-o live_proxies.txt] [--split]
+    python -m daoproxy judge [--port 8088]
+    python -m daoproxy service [--config service.json] [--cycles N]
+"""
+import argparse
+import sys
+import threading
+import time
+
+
+def log(message, quiet=False):
+    if not quiet:
+        print(message, file=sys.stderr, flush=True)
+
+
+def cmd_scrape(args):
+    from .scrape import scrape_sources
+    from .sources import RAW_PROXY_SITES
+    from .source_stats import SourceStats, save_proxy_sources
+    from .export import write_proxy_list
+    from .seen import SeenFilter, SEEN_FILE
+    from . import dnscache
+
+    source_stats = SourceStats()
+    sites = RAW_PROXY_SITES
+    if args.auto_tune:
+        sites, skipped = source_stats.plan(RAW_PROXY_SITES)
+        log(f"auto-tune: skipping {len(skipped)} sources", args.quiet)
+    dnscache.install(dnscache.hosts_of(sites))
+
+    def on_source(url, added, error):
+        log(f"{'ok ' if error is None else 'err'} {url} ({error or f'+{added}'})", args.quiet)
+
+    start = time.time()
+    proxy_sources = scrape_sources(sites, args.workers, args.timeout, source_stats, on_source,
+                                   rate=args.source_rate or None)
+    proxies = sorted(proxy_sources)
+    if args.seen_filter or args.new_only:
+        with SeenFilter(args.seen_filter or SEEN_FILE) as seen:
+            new, _ = seen.split_new(proxies)
+        log(f"{len(new)} new, {len(proxies) - len(new)} checked in earlier runs", args.quiet)
+        if args.new_only:
+            proxies = new
+    write_proxy_list(proxies, args.output)
+    save_proxy_sources(proxy_sources)
+    source_stats.save()
+    log(f"{len(proxies)} proxies -> {args.output} in {time.time() - start:.2f}s "
+        f"(dns hit rate {dnscache.dns_cache.stats()['hit_rate']})", args.quiet)
+    return 0 if proxy_sources else 1
+
+
+def cmd_check(args):
+    from .check import check_many, parse_profile, probe_judge, JUDGE_URL
+    from .ratelimit import limiter
+    from . import dnscache
+    from .validate import load_proxies
+    from .export import write_proxy_list, save_results
+    from .source_stats import SourceStats, load_proxy_sources
+    from .scheduler import load_previous_live, prioritize
+    from .seen import SeenFilter, SEEN_FILE
+
+    limiter.set_limit(args.judge or JUDGE_URL, args.judge_rate)
+    profiles = [parse_profile(spec) for spec in args.verify]
+    dnscache.install(dnscache.hosts_of([args.judge or JUDGE_URL] + [p.url for p in profiles]))
+    proxies = load_proxies(args.file)
+    proxy_sources = load_proxy_sources()
+    source_stats = SourceStats()
+    seen = None
+    if args.seen_filter or args.new_only:
+        seen = SeenFilter(args.seen_filter or SEEN_FILE)
+        if args.new_only:
+            proxies, _ = seen.split_new(proxies)
+    if not args.no_priority:
+        proxies = prioritize(proxies, load_previous_live(), proxy_sources, source_stats, seen)
+    lock = threading.Lock()  # Guards source_stats and seen
+
+    def on_result(proxy, result):
+        if seen is not None:
+            with lock:
+                seen.add(proxy)
+        if proxy in proxy_sources:
+            with lock:
+                source_stats.record_check(proxy_sources[proxy], result is not None,
+                                          result["ping"] if result else None)
+
+    start = time.time()
+    real_ip, echoes_headers = probe_judge(args.judge, args.timeout)
+    if not echoes_headers:
+        log("judge does not echo headers, anonymity will be Transparent/Unknown only", args.quiet)
+    log(f"checking {len(proxies)} proxies with {args.threads} threads...", args.quiet)
+    live = check_many(proxies, args.timeout, args.threads, args.protocol, args.judge,
+                      on_result, args.stop_after, profiles=profiles,
+                      real_ip=real_ip, min_anonymity=args.min_anonymity, fast_timeout=args.fast_timeout)
+    write_proxy_list((p["proxy"] for p in live), args.output)
+    if args.split:
+        save_results(live)
+    if proxy_sources:
+        source_stats.save()
+    if seen is not None:
+        seen.close()
+    log(f"{len(live)}/{len(proxies)} live -> {args.output} in {time.time() - start:.2f}s "
+        f"(dns hit rate {dnscache.dns_cache.stats()['hit_rate']})", args.quiet)
+    return 0 if live else 1
+
+
+def cmd_service(args):
+    import signal
+    from .service import Service
+    from .metrics import metrics, instrument_requests
+
+    instrument_requests()
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    service = Service(args.config, lambda message: log(message, args.quiet))
+    try:
+        service.reload()
+    except (OSError, ValueError) as e:
+        log(f"config {args.config}: {e}")
+        return 2
+
+    def on_signal(*_):
+        # Lần 1: chu kỳ đang chạy dừng lại, bản đã publish giữ nguyên; lần 2: thoát ngay
+        if service.stopping.is_set():
+            raise KeyboardInterrupt
+        log("stopping...", args.quiet)
+        service.stop()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+    log(f"service: {args.config}, every {service.config['interval']}s -> {service.config['output_dir']}/", args.quiet)
+    return 0 if service.run(args.cycles) or service.stopping.is_set() else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m daoproxy", description="Headless proxy scraper / checker")
+    parser.add_argument("--quiet", "-q", action="store_true", help="No progress output on stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scrape = commands.add_parser("scrape", help="Scrape the default sources")
+    scrape.add_argument("--output", "-o", default="proxy.txt", help="Output file (default: proxy.txt)")
+    scrape.add_argument("--auto-tune", action="store_true", help="Skip low-yield sources (source_stats.json)")
+    scrape.add_argument("--workers", type=int, default=16, help="Concurrent fetches (default: 16)")
+    scrape.add_argument("--timeout", type=int, default=10, help="Fetch timeout (default: 10s)")
+    scrape.add_argument("--source-rate", type=float, default=5.0,
+                        help="Max requests/s per source host, 0 = unlimited (default: 5)")
+    scrape.add_argument("--seen-filter", nargs="?", const="seen_proxies.bloom", metavar="FILE",
+                        help="Count proxies not checked by earlier runs (default: seen_proxies.bloom)")
+    scrape.add_argument("--new-only", action="store_true", help="Only write proxies never checked before")
+
+    check = commands.add_parser("check", help="Check a proxy file")
+    check.add_argument("file", help="Input proxy file")
+    check.add_argument("--output", "-o", default="live_proxies.txt", help="Live proxies (default: live_proxies.txt)")
+    check.add_argument("--split", action="store_true", help="Also write live_<protocol>.txt / live_<Country>.txt")
+    check.add_argument("--threads", "-t", type=int, default=100, help="Threads (default: 100)")
+    check.add_argument("--timeout", type=int, default=10, help="Timeout (default: 10s)")
+    check.add_argument("--fast-timeout", type=int, default=3,
+                       help="First-pass timeout, only read timeouts are retried with --timeout (default: 3s, 0 = off)")
+    check.add_argument("--protocol", choices=("HTTP", "HTTPS", "SOCKS4", "SOCKS5"),
+                       help="Proxy scheme (default: HTTP, labelled by port)")
+    check.add_argument("--judge", help="Judge URL returning ip-api style JSON")
+    check.add_argument("--verify", action="append", default=[], metavar="PROFILE",
+                       help="Extra check after the judge: 'https' or 'name=URL[|status[|body]]'; repeatable")
+    check.add_argument("--stop-after", type=int, default=0, help="Stop once N live proxies are found")
+    check.add_argument("--no-priority", action="store_true", help="Check in file order instead of by prior score")
+    check.add_argument("--seen-filter", nargs="?", const="seen_proxies.bloom", metavar="FILE",
+                       help="Record checked proxies across runs, unseen ones first (default: seen_proxies.bloom)")
+    check.add_argument("--new-only", action="store_true", help="Only check proxies never checked before")
+    check.add_argument("--min-anonymity", choices=("Transparent", "Anonymous", "Elite"),
+                       help="Only keep proxies at least this anonymous (needs a judge that echoes headers)")
+    check.add_argument("--judge-rate", type=float, default=0,
+                       help="Max judge requests/s, 0 = unlimited (default: 0)")
+
+    judge = commands.add_parser("judge", help="Serve a header-echoing judge for anonymity checks")
+    judge.add_argument("--host", default="0.0.0.0", help="Bind address (default: 0.0.0.0)")
+    judge.add_argument("--port", type=int, default=8088, help="Port (default: 8088)")
+
+    service = commands.add_parser("service", help="Scrape + check every interval, hot-reloading the config file")
+    service.add_argument("--config", "-c", default="service.json",
+                         help="JSON config, re-read when it changes; missing = defaults (default: service.json)")
+    service.add_argument("--cycles", type=int, default=0, help="Stop after N cycles (default: 0 = run until stopped)")
+    service.add_argument("--metrics-port", type=int, default=0,
+                         help="Serve Prometheus /metrics and JSON /summary on 127.0.0.1:PORT (default: off)")
+
+    args = parser.parse_args(argv)
+    if args.command == "judge":
+        from .judge import serve
+        log(f"judge on http://{args.host}:{args.port}/", args.quiet)
+        serve(args.port, args.host)
+        return 0
+    if args.command == "service":
+        return cmd_service(args)
+    return cmd_scrape(args) if args.command == "scrape" else cmd_check(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
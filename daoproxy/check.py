@@ -0,0 +1,309 @@
+import re
+import time
+import threading
+import concurrent.futures
+
+from .metrics import metrics
+from .ratelimit import limiter, retry_after
+from .validate import guess_protocol, split_proxy, format_address
+
+# Judge endpoint, returns ip-api style JSON
+JUDGE_URL = "http://ip-api.com/json"
+CHECK_TIMEOUT = 10
+# Two-lane checks: every proxy first gets FAST_TIMEOUT; only proxies that accepted the connection
+# but answered too slowly are retried with the full timeout in the slow lane, on 1/SLOW_LANE_SHARE
+# of the threads while the fast lane runs. Refused / unreachable proxies are dead after the fast lane.
+FAST_TIMEOUT = 3
+SLOW_LANE_SHARE = 4
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+PROXY_SCHEMES = {"HTTP": "http", "HTTPS": "http", "SOCKS4": "socks4", "SOCKS5": "socks5"}
+# Scheme ghi trong proxy ('socks5://ip:port', từ nguồn có giao thức) -> protocol
+SCHEME_PROTOCOLS = {"http": "HTTP", "https": "HTTPS", "socks4": "SOCKS4", "socks5": "SOCKS5"}
+# Default HTTPS CONNECT target: tiny 204 response, no body to download
+HTTPS_URL = "https://www.google.com/generate_204"
+
+# Lowest to highest; "Unknown" = judge does not echo headers (e.g. ip-api)
+ANONYMITY_LEVELS = ("Transparent", "Anonymous", "Elite")
+# Headers a proxy adds that reveal a proxy is in use
+PROXY_HEADERS = frozenset((
+    "via", "forwarded", "x-forwarded-for", "x-forwarded", "forwarded-for", "x-real-ip", "client-ip",
+    "x-client-ip", "x-cluster-client-ip", "x-originating-ip", "true-client-ip", "x-proxy-id",
+))
+# Tách IP trong giá trị header: "a, b", "for=a;proto=http", 'for="[v6]"'
+HEADER_TOKENS = re.compile(r'[\s,;="\[\]]+')
+
+
+def probe_judge(judge_url=None, timeout=CHECK_TIMEOUT):
+    """(our IP as the judge sees it, judge echoes headers?) from one direct request; (None, False) if unreachable"""
+    import requests
+    try:
+        data = requests.get(judge_url or JUDGE_URL, timeout=timeout, headers=HEADERS).json()
+        return data.get("query"), "headers" in data
+    except Exception:
+        return None, False
+
+
+def classify_anonymity(data, real_ip=None):
+    """Transparent / Anonymous / Elite / Unknown from the origin IP and headers the judge echoed"""
+    headers = {name.lower(): str(value) for name, value in (data.get("headers") or {}).items()}
+    if real_ip and (data.get("query") == real_ip or
+                    any(real_ip in HEADER_TOKENS.split(value) for value in headers.values())):
+        return "Transparent"
+    if "headers" not in data:
+        return "Unknown"
+    if PROXY_HEADERS.intersection(headers):
+        return "Anonymous"
+    return "Elite"
+
+
+def meets_anonymity(level, minimum):
+    """True if level is at least minimum (None = no requirement, Unknown never qualifies)"""
+    if not minimum:
+        return True
+    return level in ANONYMITY_LEVELS and ANONYMITY_LEVELS.index(level) >= ANONYMITY_LEVELS.index(minimum)
+
+
+class Profile:
+    """Verification stage run after the judge: GET url through the proxy, expect status / body text"""
+
+    def __init__(self, name, url, status=200, body=None):
+        self.name = name
+        self.url = url
+        self.status = status
+        self.body = body
+
+    def verify(self, session, proxies, timeout):
+        # stream=True: không tải body nếu chỉ cần status
+        with session.get(self.url, proxies=proxies, timeout=timeout, headers=HEADERS, stream=True) as response:
+            if response.status_code != self.status:
+                return False
+            return self.body is None or self.body in response.text
+
+    def spec(self):
+        return "|".join([f"{self.name}={self.url}", str(self.status)] + ([self.body] if self.body is not None else []))
+
+    def __repr__(self):
+        return f"Profile({self.spec()!r})"
+
+
+def parse_profile(spec):
+    """'https' | 'https=URL' | 'name=URL[|status[|body text]]' -> Profile
+
+    The judge GET always runs first, these stages only run for proxies that passed it.
+    """
+    name, _, rest = spec.partition("=")
+    if name == "https" and not rest:
+        return Profile("https", HTTPS_URL, 204)
+    if not rest:
+        raise ValueError(f"invalid verification profile {spec!r}, expected name=URL[|status[|body]]")
+    url, _, rest = rest.partition("|")
+    status, _, body = rest.partition("|")
+    return Profile(name, url, int(status) if status else 200, body or None)
+
+
+def check_proxy(proxy, timeout=CHECK_TIMEOUT, protocol=None, judge_url=None, profiles=(),
+                real_ip=None, min_anonymity=None, lane=None, requeue=None):
+    """Check proxy through the judge, returns a result dict if live else None (requeue: see check_many)"""
+    import requests
+    hint, auth, host, port = split_proxy(proxy)
+    protocol = SCHEME_PROTOCOLS.get(hint, protocol)
+    scheme = PROXY_SCHEMES.get(protocol, "http")
+    address = format_address(host, port)
+    url = f"{scheme}://{auth}@{address}" if auth else f"{scheme}://{address}"
+    proxies = {"http": url, "https": url}
+    session = requests.Session()
+    latencies = None
+    judge_url = judge_url or JUDGE_URL
+    start = time.time()
+    try:
+        limiter.wait(judge_url)
+        request_start = time.time()
+        with metrics.timer("request"):
+            response = session.get(judge_url, proxies=proxies, timeout=timeout, headers=HEADERS)
+        if response.status_code == 429:
+            metrics.incr("throttled")
+            delay = retry_after(response)
+            if delay > timeout:
+                metrics.incr("check_dead")
+                return None
+            time.sleep(delay)
+            limiter.wait(judge_url)
+            request_start = time.time()
+            with metrics.timer("request"):
+                response = session.get(judge_url, proxies=proxies, timeout=timeout, headers=HEADERS)
+        ping = round((time.time() - request_start) * 1000)
+        if response.status_code != 200:
+            metrics.incr("check_dead")
+            return None
+        with metrics.timer("json"):
+            data = response.json()
+        anonymity = classify_anonymity(data, real_ip)
+        if not meets_anonymity(anonymity, min_anonymity):
+            metrics.incr("verify_failed")
+            metrics.incr("check_dead")
+            return None
+
+        latencies = {"http": ping}
+        for profile in profiles:
+            stage_start = time.time()
+            with metrics.timer("verify"):
+                ok = profile.verify(session, proxies, timeout)
+            if not ok:
+                metrics.incr("verify_failed")
+                metrics.incr("check_dead")
+                return None
+            latencies[profile.name] = round((time.time() - stage_start) * 1000)
+    except Exception as e:
+        if requeue is not None and isinstance(e, requests.ReadTimeout):
+            metrics.incr("requeued")
+            requeue(proxy)
+            return None
+        metrics.incr("check_timeouts" if isinstance(e, requests.Timeout) else "check_errors")
+        if latencies is not None:
+            metrics.incr("verify_failed")  # Qua judge nhưng lỗi ở profile
+        return None
+    finally:
+        session.close()
+        metrics.record("check", time.time() - start)
+
+    metrics.incr("check_live")
+    return {
+        "proxy": proxy,
+        "host": host,
+        "port": port,
+        "ipv": "IPV6" if ":" in host else "IPV4",
+        "auth": auth,
+        "protocol": protocol or guess_protocol(port),
+        "country": data.get("country", "Unknown"),
+        "city": data.get("city", "Unknown"),
+        "isp": data.get("isp", "Unknown"),
+        "org": data.get("org", "Unknown"),
+        "asn": data.get("as", "Unknown"),
+        "anonymity": anonymity,
+        "ping": ping,
+        "profiles": latencies,
+        "lane": lane,
+        "status": "LIVE",
+    }
+
+
+class SlowLane:
+    """Executor for proxies requeued by the fast lane
+
+    threads // SLOW_LANE_SHARE checks run at once while the fast lane is busy; after
+    fast_lane_done() the slow lane gets all `threads`.
+    """
+
+    def __init__(self, threads):
+        share = max(1, threads // SLOW_LANE_SHARE)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=threads)
+        self.gate = threading.Semaphore(share)
+        self.extra = threads - share
+        self.futures = []  # list.append is atomic, submit() is called from fast-lane threads
+
+    def _run(self, func, args):
+        with self.gate:
+            return func(*args)
+
+    def submit(self, func, *args):
+        future = self.executor.submit(self._run, func, args)
+        self.futures.append(future)
+        return future
+
+    def fast_lane_done(self):
+        if self.extra:
+            self.gate.release(self.extra)
+            self.extra = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fast_lane_done()
+        self.executor.shutdown(wait=True)
+
+
+def check_many(proxies, timeout=CHECK_TIMEOUT, threads=100, protocol=None, judge_url=None,
+               on_result=None, stop_after=0, stop=None, profiles=(), real_ip=None, min_anonymity=None,
+               fast_timeout=None, check=None, feed=None):
+    """Check proxies on a thread pool, returns the live results in completion order
+
+    With fast_timeout (< timeout) proxies are first checked with fast_timeout on `threads`
+    threads; those that connected but timed out are rechecked with the full timeout in a
+    SlowLane running alongside the fast lane.
+    on_result(proxy, result) is called from the worker threads once per proxy (result None = dead).
+    Proxies still queued are skipped once stop_after live are found or the stop Event is set.
+    check(proxy, timeout, lane, requeue) replaces check_proxy (the protocol / judge / profile
+    arguments are then unused); like check_proxy it hands a slow proxy to requeue and returns None.
+    feed(submit) runs in its own thread: proxies passed to submit(proxies), from any thread until
+    the last check ends, are checked too; the slow lane gets every thread only once feed returned.
+    """
+    stop = stop or threading.Event()
+    live = []  # list.append is atomic, no lock needed
+    tiered = bool(fast_timeout) and fast_timeout < timeout
+    if check is None:
+        def check(proxy, lane_timeout, lane=None, requeue=None):
+            return check_proxy(proxy, lane_timeout, protocol, judge_url, profiles, real_ip, min_anonymity,
+                               lane, requeue)
+
+    def run(proxy, lane_timeout, lane, requeue=None):
+        if stop.is_set():
+            return
+        requeued = []
+        result = check(proxy, lane_timeout, lane, requeued.append if requeue else None)
+        if requeued:
+            requeue(proxy)
+            return
+        if result:
+            live.append(result)
+            if stop_after and len(live) >= stop_after:
+                stop.set()
+        if on_result is not None:
+            on_result(proxy, result)
+
+    futures = []  # list.extend is atomic, submit() is called from the feed thread and worker threads
+    fed = threading.Event()
+    with SlowLane(threads) as slow_lane, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        def requeue(proxy):
+            if not stop.is_set():
+                slow_lane.submit(run, proxy, timeout, "slow")
+
+        def submit(batch):
+            if stop.is_set():
+                return
+            if tiered:
+                futures.extend([executor.submit(run, proxy, fast_timeout, "fast", requeue) for proxy in batch])
+            else:
+                futures.extend([executor.submit(run, proxy, timeout, None) for proxy in batch])
+
+        def feeding():
+            try:
+                feed(submit)
+            finally:
+                fed.set()
+
+        submit(proxies)
+        if feed is None:
+            fed.set()
+        else:
+            threading.Thread(target=feeding, daemon=True).start()
+        # Fast lane trước; khi xong (và feed đã trả về) thì slow lane được dùng hết thread. Check của
+        # lane nào cũng có thể submit thêm (vd. sampler) nên lặp tới khi cả hai lane hết việc
+        lanes = (futures, slow_lane.futures)
+        drained = [0, 0]
+        while True:
+            feeding_now = not fed.is_set()  # Đọc trước khi drain để không sót lô cuối
+            for i, lane_futures in enumerate(lanes):
+                while drained[i] < len(lane_futures):
+                    batch = lane_futures[drained[i]:]
+                    drained[i] += len(batch)
+                    for future in batch:
+                        future.result()
+                if i == 0 and fed.is_set():
+                    slow_lane.fast_lane_done()
+            if feeding_now:
+                fed.wait()
+            elif drained[0] == len(futures) and drained[1] == len(slow_lane.futures):
+                break
+    return live
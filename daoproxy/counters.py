@@ -0,0 +1,143 @@
+import threading
+import time
+import weakref
+
+# HDR-style log-linear buckets: exact below 16ms, then 8 sub-buckets per power of two (~12% error)
+SUB_BUCKETS = 8
+LINEAR_LIMIT = 2 * SUB_BUCKETS
+BUCKETS = 256
+
+
+def bucket_index(value):
+    """Latency (ms) -> histogram bucket"""
+    value = int(value)
+    if value < LINEAR_LIMIT:
+        return max(value, 0)
+    shift = value.bit_length() - 4
+    index = LINEAR_LIMIT + (shift - 1) * SUB_BUCKETS + ((value >> shift) - SUB_BUCKETS)
+    return min(index, BUCKETS - 1)
+
+
+def bucket_value(index):
+    """Bucket -> representative latency (middle of the bucket)"""
+    if index < LINEAR_LIMIT:
+        return index
+    shift = (index - LINEAR_LIMIT) // SUB_BUCKETS + 1
+    low = (SUB_BUCKETS + (index - LINEAR_LIMIT) % SUB_BUCKETS) << shift
+    return low + (1 << shift) // 2
+
+
+class _Owner:
+    """Lives in a thread's local storage; freed (and its shard retired) when the thread ends"""
+    __slots__ = ("__weakref__",)
+
+
+class StatsAggregator:
+    """Counters and latency histograms sharded per thread, merged on read
+
+    Each worker thread writes only to its own shard, so the hot path takes
+    no lock. Shards are registered once per thread and have a fixed key set,
+    so readers can sum them while writers keep going. When a thread ends its
+    shard is folded into one retired shard, so short-lived pool threads do
+    not pile up.
+    """
+
+    def __init__(self, keys, histograms=()):
+        self.keys = tuple(keys)
+        self.histograms = tuple(histograms)
+        self.local = threading.local()
+        self.shards = {}    # id -> shard of a running thread
+        self.retired = self._new_shard()
+        self.register_lock = threading.RLock()  # RLock: _retire chạy từ GC, có thể ngay trong _shard
+        self.total = 0
+        self.start_time = None
+        self.end_time = None
+
+    def _new_shard(self):
+        return dict.fromkeys(self.keys, 0), {name: [0] * BUCKETS for name in self.histograms}
+
+    def _shard(self):
+        shard = getattr(self.local, "shard", None)
+        if shard is None:
+            shard = self._new_shard()
+            owner = _Owner()
+            with self.register_lock:
+                self.shards[id(owner)] = shard
+            weakref.finalize(owner, self._retire, id(owner))
+            self.local.shard = shard
+            self.local.owner = owner
+        return shard
+
+    def _retire(self, shard_id):
+        """Fold a finished thread's shard into self.retired (a new object, so readers see old or new)"""
+        with self.register_lock:
+            counters, histograms = self.shards.pop(shard_id)
+            total_counters, total_histograms = self.retired
+            merged = ({key: total_counters[key] + counters[key] for key in self.keys},
+                      {name: [a + b for a, b in zip(total_histograms[name], histograms[name])]
+                       for name in self.histograms})
+            self.retired = merged
+
+    def _all_shards(self):
+        with self.register_lock:
+            return [self.retired] + list(self.shards.values())
+
+    def start(self):
+        """Mark the start of checking (CPM is measured from here)"""
+        self.start_time = time.time()
+        self.end_time = None
+
+    def stop(self):
+        self.end_time = time.time()
+
+    def incr(self, key, n=1):
+        self._shard()[0][key] += n
+
+    def observe(self, name, ms):
+        self._shard()[1][name][bucket_index(ms)] += 1
+
+    def counts(self):
+        totals = dict.fromkeys(self.keys, 0)
+        for counters, _ in self._all_shards():
+            for key in self.keys:
+                totals[key] += counters[key]
+        return totals
+
+    def histogram(self, name):
+        merged = [0] * BUCKETS
+        for _, histograms in self._all_shards():
+            for i, count in enumerate(histograms[name]):
+                if count:
+                    merged[i] += count
+        return merged
+
+    def percentiles(self, name, points=(50, 90, 99)):
+        """{p: latency_ms} from the merged histogram, None when empty"""
+        merged = self.histogram(name)
+        total = sum(merged)
+        result = dict.fromkeys(points)
+        if not total:
+            return result
+        targets = sorted(points)
+        seen = 0
+        for index, count in enumerate(merged):
+            seen += count
+            while targets and seen >= total * targets[0] / 100:
+                result[targets.pop(0)] = bucket_value(index)
+            if not targets:
+                break
+        return result
+
+    def elapsed(self):
+        if self.start_time is None:
+            return 0
+        return (self.end_time or time.time()) - self.start_time
+
+    def snapshot(self):
+        """Merged counters plus total, elapsed and checks per minute"""
+        data = self.counts()
+        elapsed = self.elapsed()
+        data["total"] = self.total
+        data["elapsed"] = elapsed
+        data["cpm"] = int(data.get("checked", 0) / elapsed * 60) if elapsed > 0 else 0
+        return data
@@ -0,0 +1,258 @@
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+from .check import check_many
+
+DEFAULT_PORT = 8899
+BATCH_SIZE = 200
+LEASE_TIMEOUT = 120     # Worker không trả kết quả trong N giây -> giao batch cho worker khác
+WAIT_SECONDS = 1        # Worker chờ khi tạm thời hết batch (các batch khác đang được lease)
+RENEWS_PER_LEASE = 3    # Worker đang check gia hạn lease N lần mỗi lease_timeout
+
+
+class Coordinator:
+    """Shard a proxy list into batches and lease them to workers over HTTP
+
+    A batch is leased to one worker at a time; workers renew the lease while they
+    check it. Expired leases (crashed or stuck worker) go back to the front of the queue; results for a batch
+    are accepted once, later duplicates are dropped. add() queues more proxies
+    while the run is going (e.g. from on_result).
+    """
+
+    def __init__(self, proxies, on_result, batch_size=BATCH_SIZE, lease_timeout=LEASE_TIMEOUT,
+                 config=None, token=None):
+        self.on_result = on_result
+        self.batch_size = batch_size
+        self.lease_timeout = lease_timeout
+        self.config = config or {}
+        self.token = token
+        self.lock = threading.Lock()
+        self.pending = deque()
+        self.leases = {}          # batch_id -> (worker, deadline)
+        self.batches = {}         # batch_id -> proxies
+        self.completed = set()
+        self.completing = set()   # Đang gọi on_result, chưa tính là xong (on_result có thể add())
+        self.workers = {}         # worker -> last seen
+        self.reassigned = 0
+        self.stopped = False
+        self.server = None
+        self.add(proxies)
+
+    def add(self, proxies):
+        """Queue proxies as new batches"""
+        with self.lock:
+            for start in range(0, len(proxies), self.batch_size):
+                batch_id = len(self.batches)
+                self.batches[batch_id] = proxies[start:start + self.batch_size]
+                self.pending.append(batch_id)
+
+    def _reap(self, now):
+        """Requeue expired leases (called with lock held)"""
+        for batch_id, (worker, deadline) in list(self.leases.items()):
+            if deadline < now:
+                del self.leases[batch_id]
+                self.pending.appendleft(batch_id)
+                self.reassigned += 1
+
+    def lease(self, worker):
+        now = time.time()
+        with self.lock:
+            self.workers[worker] = now
+            self._reap(now)
+            if self.stopped or self.finished_locked():
+                return {"done": True}
+            if not self.pending:
+                return {"wait": WAIT_SECONDS}
+            batch_id = self.pending.popleft()
+            self.leases[batch_id] = (worker, now + self.lease_timeout)
+            return {"batch_id": batch_id, "proxies": self.batches[batch_id], "config": self.config,
+                    "lease_timeout": self.lease_timeout}
+
+    def renew(self, worker, batch_id):
+        """Extend worker's lease on batch_id, False if it expired and went to another worker"""
+        now = time.time()
+        with self.lock:
+            self.workers[worker] = now
+            if self.leases.get(batch_id, (None,))[0] != worker:
+                return False
+            self.leases[batch_id] = (worker, now + self.lease_timeout)
+            return True
+
+    def submit(self, worker, batch_id, results):
+        with self.lock:
+            self.workers[worker] = time.time()
+            if batch_id in self.completed or batch_id in self.completing or batch_id not in self.batches:
+                return False
+            self.completing.add(batch_id)
+            self.leases.pop(batch_id, None)
+            try:
+                self.pending.remove(batch_id)
+            except ValueError:
+                pass
+            proxies = self.batches[batch_id]
+        try:
+            for proxy, result in zip(proxies, results):
+                self.on_result(proxy, result)
+        finally:
+            with self.lock:
+                self.completing.discard(batch_id)
+                self.completed.add(batch_id)
+        return True
+
+    def stop(self):
+        """Stop handing out batches, workers exit on their next lease"""
+        with self.lock:
+            self.stopped = True
+
+    def finished_locked(self):
+        return len(self.completed) == len(self.batches)
+
+    def finished(self):
+        with self.lock:
+            return self.stopped or self.finished_locked()
+
+    def status(self):
+        with self.lock:
+            return {
+                "batches": len(self.batches),
+                "completed": len(self.completed),
+                "leased": len(self.leases),
+                "pending": len(self.pending),
+                "reassigned": self.reassigned,
+                "workers": len(self.workers),
+            }
+
+    def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Start the HTTP endpoint in a background thread"""
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        coordinator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, code, data):
+                body = json.dumps(data).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _authorized(self):
+                if coordinator.token and self.headers.get("X-Token") != coordinator.token:
+                    self._reply(403, {"error": "bad token"})
+                    return False
+                return True
+
+            def do_GET(self):
+                if self._authorized():
+                    self._reply(200, coordinator.status())
+
+            def do_POST(self):
+                if not self._authorized():
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    data = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._reply(400, {"error": "bad json"})
+                    return
+                worker = data.get("worker", self.client_address[0])
+                if self.path == "/lease":
+                    self._reply(200, coordinator.lease(worker))
+                elif self.path == "/result":
+                    accepted = coordinator.submit(worker, data.get("batch_id"), data.get("results", []))
+                    self._reply(200, {"accepted": accepted})
+                elif self.path == "/renew":
+                    self._reply(200, {"renewed": coordinator.renew(worker, data.get("batch_id"))})
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server.server_address
+
+    def shutdown(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def _renew_lease(url, worker, lease, headers, done):
+    """Renew lease every lease_timeout / RENEWS_PER_LEASE until done is set"""
+    import requests
+    interval = lease.get("lease_timeout", LEASE_TIMEOUT) / RENEWS_PER_LEASE
+    while not done.wait(interval):
+        try:
+            requests.post(f"{url}/renew", json={"worker": worker, "batch_id": lease["batch_id"]},
+                          headers=headers, timeout=interval)
+        except requests.RequestException:
+            pass  # Lần sau thử lại; hết hạn thật thì batch được giao lại như trước
+
+
+def run_worker(url, check_func, threads=50, token=None, configure=None, retries=5):
+    """Pull batches from a coordinator, check them and post results back
+
+    Each batch goes through check_many(check=check_func): check_func(proxy, timeout, lane, requeue)
+    returns a result dict or None; with the config's fast_timeout, proxies it hands to requeue are
+    rechecked in the slow lane.
+    configure(config) is called with the coordinator's config on each batch. The lease is
+    renewed in the background while a batch is being checked, however long it takes.
+    """
+    import requests
+    url = url.rstrip("/")
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+    headers = {"X-Token": token} if token else {}
+    session = requests.Session()
+    failures = 0
+    checked = 0
+
+    while True:
+        try:
+            lease = session.post(f"{url}/lease", json={"worker": worker},
+                                 headers=headers, timeout=30).json()
+            failures = 0
+        except (requests.RequestException, ValueError):
+            failures += 1
+            if failures >= retries:
+                break
+            time.sleep(WAIT_SECONDS * failures)
+            continue
+
+        if lease.get("done"):
+            break
+        if "wait" in lease:
+            time.sleep(lease["wait"])
+            continue
+
+        renewing = threading.Event()
+        threading.Thread(target=_renew_lease, daemon=True,
+                         args=(url, worker, lease, headers, renewing)).start()
+        try:
+            config = lease.get("config", {})
+            if configure is not None:
+                configure(config)
+            checks = {}  # proxy -> result, gửi lại theo thứ tự của batch
+            check_many(lease["proxies"], config.get("timeout", 10), threads, on_result=checks.__setitem__,
+                       fast_timeout=config.get("fast_timeout"), check=check_func)
+            results = [checks.get(p) for p in lease["proxies"]]
+        finally:
+            renewing.set()
+        checked += len(results)
+
+        # Coordinator tạm thời lỗi: thử gửi lại, lease hết hạn thì batch được giao lại
+        for attempt in range(retries):
+            try:
+                session.post(f"{url}/result",
+                             json={"worker": worker, "batch_id": lease["batch_id"], "results": results},
+                             headers=headers, timeout=30)
+                break
+            except requests.RequestException:
+                time.sleep(WAIT_SECONDS * (attempt + 1))
+    return checked
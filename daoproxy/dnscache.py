@@ -0,0 +1,143 @@
+import socket
+import threading
+import time
+import concurrent.futures
+from urllib.parse import urlsplit
+
+from .metrics import metrics
+
+DNS_TTL = 300          # Giây giữ một kết quả phân giải
+NEGATIVE_TTL = 30      # Giây giữ lỗi phân giải (host không tồn tại), tránh hỏi lại liên tục
+PREFETCH_WORKERS = 8
+
+
+def _is_ip(host):
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host)
+            return True
+        except (OSError, ValueError):
+            pass
+    return False
+
+
+def hosts_of(urls):
+    """Unique hostnames of urls, in first-seen order"""
+    return list(dict.fromkeys(host for host in (urlsplit(url).hostname for url in urls) if host))
+
+
+class DnsCache:
+    """Process-wide getaddrinfo cache with TTL, shared by every thread
+
+    Entries are kept per (host, family, type, proto, flags) without the port, so one lookup
+    serves every URL on a host. Concurrent misses for the same host wait for a single lookup.
+    resolver defaults to the real socket.getaddrinfo (a stub can be passed for testing).
+    """
+
+    def __init__(self, ttl=DNS_TTL, negative_ttl=NEGATIVE_TTL, resolver=None):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.resolver = resolver or socket.getaddrinfo
+        self.entries = {}   # key -> (expires, addrinfo list or gaierror)
+        self.pending = {}   # key -> Event của lookup đang chạy
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """Drop-in for socket.getaddrinfo"""
+        if isinstance(host, bytes):
+            host = host.decode("idna")
+        if port is None:
+            port = 0
+        elif isinstance(port, (str, bytes)):
+            if not port.isdigit():
+                return self.resolver(host, port, family, type, proto, flags)  # Tên service ("http")
+            port = int(port)
+        if not host or _is_ip(host):
+            return self.resolver(host, port, family, type, proto, flags)
+
+        key = (host.lower(), family, type, proto, flags)
+        result = self._lookup(key)
+        if isinstance(result, Exception):
+            raise socket.gaierror(*result.args)  # Bản sao mới, tránh traceback dồn lên lỗi đã cache
+        # sockaddr = (ip, port) hoặc (ip, port, flowinfo, scope_id)
+        return [(af, kind, protocol, name, sockaddr[:1] + (port,) + sockaddr[2:])
+                for af, kind, protocol, name, sockaddr in result]
+
+    def _lookup(self, key):
+        while True:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                metrics.incr("dns_hits")
+                return entry[1]
+            with self.lock:
+                event = self.pending.get(key)
+                owner = event is None
+                if owner:
+                    event = self.pending[key] = threading.Event()
+            if owner:
+                break
+            event.wait()  # Thread khác đang phân giải host này
+
+        metrics.incr("dns_misses")
+        try:
+            with metrics.timer("dns"):
+                result = self.resolver(key[0], None, *key[1:])
+            expires = time.monotonic() + self.ttl
+        except socket.gaierror as e:
+            result = e
+            expires = time.monotonic() + self.negative_ttl
+        except Exception:
+            result = None  # Lỗi tạm thời: không cache
+            raise
+        finally:
+            if result is not None:
+                self.entries[key] = (expires, result)
+            with self.lock:
+                del self.pending[key]
+            event.set()
+        return result
+
+    def prefetch(self, hosts):
+        """Resolve hosts in the background (TCP, any family, as requests/urllib3 asks), returns futures"""
+        with self.lock:
+            if self.executor is None:
+                self.executor = concurrent.futures.ThreadPoolExecutor(PREFETCH_WORKERS, "dns-prefetch")
+        return [self.executor.submit(self._prefetch_one, host) for host in hosts]
+
+    def _prefetch_one(self, host):
+        try:
+            self.getaddrinfo(host, 0, socket.AF_UNSPEC, socket.SOCK_STREAM)
+        except OSError:
+            pass  # Lỗi đã được cache (negative), request thật sẽ báo lỗi
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        """{'entries', 'hits', 'misses', 'hit_rate'} (hit_rate None before any lookup)"""
+        counts = metrics.counts()
+        hits, misses = counts["dns_hits"], counts["dns_misses"]
+        return {
+            "entries": len(self.entries),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        }
+
+
+# Shared by the fetch (scrape) and check engines once install() is called
+dns_cache = DnsCache()
+
+
+def install(prefetch=()):
+    """Route socket.getaddrinfo (requests, urllib3, PySocks) through dns_cache, then pre-resolve prefetch hosts"""
+    if not getattr(socket.getaddrinfo, "_cached", False):
+        getaddrinfo = dns_cache.getaddrinfo
+
+        def cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+            return getaddrinfo(host, port, family, type, proto, flags)
+
+        cached_getaddrinfo._cached = True
+        socket.getaddrinfo = cached_getaddrinfo
+    return dns_cache.prefetch(prefetch)
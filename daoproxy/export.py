@@ -0,0 +1,76 @@
+import json
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_open(path, **kwargs):
+    """open(path, "w") that replaces path only once the file is complete, so readers never see half a list"""
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8", **kwargs) as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_proxy_list(proxies, path):
+    """One proxy per line"""
+    with atomic_open(path) as f:
+        for proxy in proxies:
+            f.write(f"{proxy}\n")
+
+
+def save_results(live_proxies, directory="."):
+    """live_proxies.txt plus live_<protocol>.txt, live_<anonymity>.txt and live_<Country>.txt splits
+
+    Returns the paths written.
+    """
+    paths = [os.path.join(directory, "live_proxies.txt")]
+    write_proxy_list((p["proxy"] for p in live_proxies), paths[0])
+
+    protocols = {}
+    levels = {}
+    countries = {}
+    for p in live_proxies:
+        protocols.setdefault(p["protocol"].lower(), []).append(p["proxy"])
+        # "Unknown" bỏ qua: trùng tên live_Unknown.txt của quốc gia trên hệ thống không phân biệt hoa thường
+        if p["anonymity"] != "Unknown":
+            levels.setdefault(p["anonymity"].lower(), []).append(p["proxy"])
+        countries.setdefault(p["country"].replace(" ", "_"), []).append(p["proxy"])
+    for proto, proxies in protocols.items():
+        paths.append(os.path.join(directory, f"live_{proto}.txt"))
+        write_proxy_list(proxies, paths[-1])
+    for level, proxies in levels.items():
+        paths.append(os.path.join(directory, f"live_{level}.txt"))
+        write_proxy_list(proxies, paths[-1])
+    for country, proxies in countries.items():
+        paths.append(os.path.join(directory, f"live_{country}.txt"))
+        write_proxy_list(proxies, paths[-1])
+    return paths
+
+
+def export_txt(results, path):
+    """'proxy | country | ping | protocol | anonymity' lines, fastest first"""
+    with atomic_open(path) as f:
+        for p in sorted(results, key=lambda x: x["ping"]):
+            f.write(f"{p['proxy']} | {p['country']} | {p['ping']}ms | {p['protocol']} | {p['anonymity']}\n")
+
+
+def export_json(results, path):
+    with atomic_open(path) as f:
+        json.dump(results, f, indent=2)
+
+
+def export_csv(results, path):
+    """Host,Port,Country,City,ISP,Ping,Protocol,Anonymity,Auth rows, fastest first (Auth = user:pass or empty)"""
+    import csv
+    with atomic_open(path, newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("Host", "Port", "Country", "City", "ISP", "Ping", "Protocol", "Anonymity", "Auth"))
+        for p in sorted(results, key=lambda x: x["ping"]):
+            writer.writerow((p["host"], p["port"], p["country"], p["city"], p["isp"], p["ping"], p["protocol"],
+                             p["anonymity"], p.get("auth") or ""))
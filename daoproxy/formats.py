@@ -0,0 +1,277 @@
+import re
+import socket
+import sys
+from array import array
+from urllib.parse import urlsplit, parse_qsl
+
+from .sources import SOURCE_FORMATS
+
+# Dòng "ip:port" (cho phép khoảng trắng / \r ở hai đầu), octet 0-255 không có số 0 ở đầu
+OCTET = rb"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+IP = OCTET + rb"\." + OCTET + rb"\." + OCTET + rb"\." + OCTET
+# IPv6 chỉ nhận trong ngoặc vuông ("[2001:db8::1]:8080"), kiểm tra lại bằng inet_pton
+IPV6 = rb"\[[0-9a-fA-F:.]+\]"
+HOST = rb"(?:" + IP + rb"|" + IPV6 + rb")"
+LINE_RE = re.compile(rb"^[ \t]*(" + IP + rb":\d{1,5})[ \t\r]*$", re.M)
+SPLIT_RE = re.compile(rb"^[ \t]*(?:(" + IP + rb":\d{1,5})[ \t\r]*$|(.*:.*))", re.M)
+# Dòng có trang trí: scheme://, user:pass@, [IPv6], ip:port:user:pass, ip:port theo sau là country / ghi chú
+RICH_LINE_RE = re.compile(
+    rb"^[ \t]*(?:([a-zA-Z][a-zA-Z0-9]{2,6})://)?(?:([^:@\s/]+):([^@\s/]+)@)?(" + HOST + rb"):(\d{1,5})"
+    rb"(?::([^:\s]+):([^:\s]+)(?=[ \t\r]*$)|[ \t:,;|][^\r\n]*)?[ \t\r]*$", re.M)
+# ip:port ở bất kỳ đâu (chuỗi JSON, text trong HTML)
+INLINE_RE = re.compile(rb"(?:([a-zA-Z][a-zA-Z0-9]{2,6})://)?(?:([^:@\s/\"'<>]+):([^@\s/\"'<>]+)@)?(?<![\d.])(" +
+                       HOST + rb"):(\d{1,5})(?!\d)")
+
+# JSON: object trong cùng + các field hay gặp (proxyscrape, geonode, ...)
+JSON_OBJECT_RE = re.compile(rb"\{[^{}]*\}")
+JSON_FIELDS = {
+    "ip": re.compile(rb'"(?:ip|host|ip_address|ipAddress|addr|address)"\s*:\s*"(' + IP + rb'|\[?[0-9a-fA-F:.]+\]?)"'),
+    "port": re.compile(rb'"port"\s*:\s*"?(\d{1,5})'),
+    "protocol": re.compile(rb'"(?:protocols?|type|scheme)"\s*:\s*(\[[^\]]*\]|"[^"]*")'),
+    "user": re.compile(rb'"(?:username|user|login)"\s*:\s*"([^"]+)"'),
+    "password": re.compile(rb'"(?:password|pass)"\s*:\s*"([^"]+)"'),
+}
+WORD_RE = re.compile(rb"[A-Za-z0-9]+")
+
+# HTML: mỗi <tr>, các <td> của nó
+ROW_RE = re.compile(rb"<tr[^>]*>(.*?)</tr>", re.S | re.I)
+CELL_RE = re.compile(rb"<t[dh][^>]*>(.*?)</t[dh]>", re.S | re.I)
+TAG_RE = re.compile(rb"<[^>]+>")
+IP_CELL_RE = re.compile(rb"\s*(" + IP + rb"|\[?[0-9a-fA-F:]+:[0-9a-fA-F:.]*\]?)\s*")
+
+# Mã giao thức lưu trong bit 48-50 của key đã pack (0 = không rõ)
+PROTOCOLS = ("", "http", "https", "socks4", "socks5")
+PROTOCOL_CODES = {name: code for code, name in enumerate(PROTOCOLS) if name}
+PROTOCOL_CODES.update(socks=4, socks5h=4, socks4a=3)
+ADDRESS_MASK = (1 << 48) - 1
+FORMATS = ("lines", "json", "csv", "html")
+
+
+def pack(ip, port, protocol=0):
+    """'a.b.c.d', port[, protocol code] -> int (protocol << 48 | ip << 16 | port)"""
+    a, b, c, d = (int(x) for x in ip.split("."))
+    return (protocol << 48) | (((a << 24) | (b << 16) | (c << 8) | d) << 16) | int(port)
+
+
+def canonical_host(host):
+    """'1.2.3.4' / '[2001:DB8:0::1]' / '2001:db8::1' -> '1.2.3.4' / '[2001:db8::1]', None if not an IP"""
+    host = host.strip("[]")
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    try:
+        packed = socket.inet_pton(family, host)
+    except (OSError, ValueError):
+        return None
+    address = socket.inet_ntop(family, packed)
+    return f"[{address}]" if family == socket.AF_INET6 else address
+
+
+def format_proxy(address, protocol="", auth=None):
+    """'ip:port' -> '[protocol://][user:pass@]ip:port'"""
+    prefix = f"{protocol}://" if protocol else ""
+    return f"{prefix}{auth}@{address}" if auth else prefix + address
+
+
+def unpack(key):
+    """Packed int -> 'a.b.c.d:port', prefixed with 'protocol://' when the source gave one"""
+    ip = (key & ADDRESS_MASK) >> 16
+    address = f"{ip >> 24}.{(ip >> 16) & 255}.{(ip >> 8) & 255}.{ip & 255}:{key & 0xFFFF}"
+    return format_proxy(address, PROTOCOLS[key >> 48])
+
+
+def protocol_code(name):
+    """b'SOCKS5' / 'socks4' -> code, 0 if unknown"""
+    if isinstance(name, (bytes, bytearray)):
+        name = name.decode("ascii", "ignore")
+    return PROTOCOL_CODES.get(name.strip().lower(), 0)
+
+
+def _pack_match(match, aton=socket.inet_aton, from_bytes=int.from_bytes):
+    ip, _, port = match.partition(b":")
+    port = int(port)
+    if 0 < port < 65536:
+        return (from_bytes(aton(ip.decode()), "big") << 16) | port
+    return -1
+
+
+def intern_proxy(address, protocol=0, auth=None):
+    """Canonical, interned '[protocol://][user:pass@]host:port' of a proxy that has no packed key"""
+    return sys.intern(format_proxy(address, PROTOCOLS[protocol], auth))
+
+
+class _Collector:
+    """Packed IPv4 keys plus the proxies that do not fit one (IPv6, credentials) of one parse"""
+
+    def __init__(self, protocol=0):
+        self.protocol = protocol
+        self.keys = {}    # dict thay set: giữ thứ tự xuất hiện (thứ tự trong file)
+        self.extra = {}
+
+    def add(self, ip, port, protocol=None, user=None, password=None):
+        port = int(port)
+        host = canonical_host(ip.decode())
+        if host is None or not 0 < port < 65536:
+            return
+        code = protocol_code(protocol) if protocol else self.protocol
+        if user and password:
+            self.extra[intern_proxy(f"{host}:{port}", code, f"{user.decode()}:{password.decode()}")] = None
+        elif host[0] == "[":
+            self.extra[intern_proxy(f"{host}:{port}", code)] = None
+        else:
+            self.keys[pack(host, port, code)] = None
+
+    def add_match(self, groups):
+        scheme, user, password, ip, port = groups[:5]
+        if len(groups) > 5 and groups[5]:
+            user, password = groups[5], groups[6]  # ip:port:user:pass
+        self.add(ip, port, scheme or None, user or None, password or None)
+
+    def result(self):
+        return array("Q", self.keys), list(self.extra)
+
+
+def parse_lines(data, protocol=0):
+    """'ip:port' lines; scheme://, user:pass@, [IPv6], ip:port:user:pass and ip:port + notes take a second pass"""
+    # Một lượt regex: dòng 'ip:port' thường vào nhóm 1, mọi dòng có ':' khác vào nhóm 2.
+    # Loại trùng trên bytes trước, chỉ pack các dòng duy nhất
+    matches = dict.fromkeys(SPLIT_RE.findall(data))
+    packed = dict.fromkeys([_pack_match(line) for line, _ in matches if line])
+    packed.pop(-1, None)
+    if protocol:
+        packed = dict.fromkeys(key | (protocol << 48) for key in packed)
+    found = _Collector(protocol)
+    found.keys = packed
+    # Lượt 2 (chậm hơn ~2.5x) chỉ chạy trên các dòng còn lại
+    rest = [other for _, other in matches if other]
+    if rest:
+        for groups in dict.fromkeys(RICH_LINE_RE.findall(b"\n".join(rest))):
+            scheme, user, _, ip, port, extra_user = groups[:6]
+            if scheme or user or extra_user or ip[:1] == b"[":
+                found.add_match(groups)
+                continue
+            # ip:port + ghi chú: IP đã qua regex, pack thẳng như lượt 1
+            key = _pack_match(ip + b":" + port)
+            if key != -1:
+                packed[key | (protocol << 48)] = None
+    return found.result()
+
+
+def parse_json(data, protocol=0):
+    """Objects with ip/port[/protocol/username/password] fields, plus 'scheme://ip:port' strings"""
+    found = _Collector(protocol)
+    for groups in dict.fromkeys(INLINE_RE.findall(data)):
+        found.add_match(groups)
+    for match in JSON_OBJECT_RE.finditer(data):
+        obj = match.group()
+        ip = JSON_FIELDS["ip"].search(obj)
+        port = JSON_FIELDS["port"].search(obj)
+        if not ip or not port:
+            continue
+        user = JSON_FIELDS["user"].search(obj)
+        password = JSON_FIELDS["password"].search(obj)
+        credentials = (user.group(1), password.group(1)) if user and password else (None, None)
+        names = JSON_FIELDS["protocol"].search(obj)
+        # "protocols": ["socks4", "socks5"] -> một proxy cho mỗi giao thức
+        codes = [w for w in WORD_RE.findall(names.group(1)) if protocol_code(w)] if names else []
+        for name in codes or [None]:
+            found.add(ip.group(1), port.group(1), name, *credentials)
+    return found.result()
+
+
+def _columns(header):
+    names = [name.strip(b" \"'").lower() for name in header]
+    find = lambda *options: next((i for i, n in enumerate(names) if n in options), None)
+    return {
+        "ip": find(b"ip", b"host", b"ip address", b"address", b"ip_address"),
+        "port": find(b"port"),
+        "protocol": find(b"protocol", b"type", b"scheme", b"protocols"),
+        "user": find(b"username", b"user", b"login"),
+        "password": find(b"password", b"pass"),
+        "proxy": find(b"proxy", b"ip:port", b"proxies"),
+    }
+
+
+def parse_csv(data, protocol=0):
+    """Delimited rows with a header naming ip/host, port[, protocol, username, password] or proxy columns"""
+    found = _Collector(protocol)
+    lines = re.finditer(rb"[^\r\n]+", data)
+    header = next(lines, None)
+    if header is None:
+        return found.result()
+    header = header.group()
+    delimiter = max((b",", b";", b"\t", b"|"), key=header.count)
+    columns = _columns(header.split(delimiter))
+    if columns["proxy"] is None and (columns["ip"] is None or columns["port"] is None):
+        return parse_lines(data, protocol)  # Không có header dùng được
+    for line in lines:
+        cells = [cell.strip(b" \"'") for cell in line.group().split(delimiter)]
+        cell = lambda name: cells[columns[name]] if columns[name] is not None and columns[name] < len(cells) else None
+        if columns["proxy"] is not None and cell("proxy"):
+            match = INLINE_RE.search(cell("proxy"))
+            if match:
+                scheme, user, password, ip, port = match.groups()
+                found.add(ip, port, scheme or cell("protocol"), user or cell("user"), password or cell("password"))
+            continue
+        ip, port = cell("ip"), cell("port")
+        if ip and port and port.isdigit() and IP_CELL_RE.fullmatch(ip):
+            found.add(ip, port, cell("protocol"), cell("user"), cell("password"))
+    return found.result()
+
+
+def parse_html(data, protocol=0):
+    """<table> rows with an IP cell followed by a port cell (free-proxy-list style), plus inline ip:port text"""
+    found = _Collector(protocol)
+    for row in ROW_RE.finditer(data):
+        cells = [TAG_RE.sub(b"", cell) for cell in CELL_RE.findall(row.group(1))]
+        for i, cell in enumerate(cells[:-1]):
+            ip = IP_CELL_RE.fullmatch(cell)
+            port = cells[i + 1].strip()
+            if ip and port.isdigit():
+                text = row.group(1).lower()
+                name = b"socks5" if b"socks5" in text else b"socks4" if b"socks4" in text else None
+                found.add(ip.group(1), port, name)
+                break
+    for groups in dict.fromkeys(INLINE_RE.findall(TAG_RE.sub(b" ", data))):
+        found.add_match(groups)
+    return found.result()
+
+
+PARSERS = {"lines": parse_lines, "json": parse_json, "csv": parse_csv, "html": parse_html}
+
+
+def detect_format(data):
+    """Sniff the body: json / html / csv (header row naming ip + port) / lines"""
+    view = memoryview(data)[:4096]
+    head = bytes(view).lstrip(b"\xef\xbb\xbf \t\r\n")
+    if head[:1] in (b"{", b"["):
+        return "json"
+    if head[:1] == b"<":
+        return "html"
+    first = head.split(b"\n", 1)[0].lower()
+    if not LINE_RE.match(first) and any(d in first for d in b",;\t|") and \
+            (b"ip" in first or b"host" in first or b"proxy" in first):
+        return "csv"
+    return "lines"
+
+
+def source_hints(url):
+    """(format or None to sniff, protocol code) for a source URL
+
+    The format comes from SOURCE_FORMATS; the protocol from the file name / query
+    ('.../socks4.txt', '?proxytype=socks5'). http / https lists give no hint: they are
+    checked as HTTP like unhinted proxies.
+    """
+    parts = urlsplit(url)
+    words = [parts.path.rsplit("/", 1)[-1]] + [value for _, value in parse_qsl(parts.query)]
+    text = " ".join(words).lower()
+    protocol = PROTOCOL_CODES["socks5"] if "socks5" in text else PROTOCOL_CODES["socks4"] if "socks4" in text else 0
+    return SOURCE_FORMATS.get(url), protocol
+
+
+def parse_body(data, fmt=None, protocol=0):
+    """Bytes -> (unique array('Q') of packed proxies, list of other proxies: IPv6 / credentials), in input order"""
+    return PARSERS[fmt or detect_format(data)](data, protocol)
+
+
+def parse_chunk(data, protocol=0):
+    """Parse one line-aligned chunk of a 'lines' body"""
+    return parse_lines(data, protocol)
@@ -0,0 +1,161 @@
+import re
+import threading
+from bisect import bisect_right, insort
+from collections import defaultdict
+
+from .check import ANONYMITY_LEVELS, meets_anonymity
+
+FIELDS = ("country", "protocol", "asn", "anonymity")
+ASN_RE = re.compile(r"AS\d+", re.I)
+
+
+def asn_of(value):
+    """'AS45899 VNPT Corp' / '45899' -> 'AS45899' ('' if none)"""
+    value = str(value or "")
+    match = ASN_RE.search(value)
+    if match:
+        return match.group().upper()
+    return f"AS{value}" if value.isdigit() else ""
+
+
+def _key(field, value):
+    if field == "country":
+        return str(value).lower()
+    if field == "asn":
+        return asn_of(value)
+    if field == "protocol":
+        return str(value).upper()
+    return value
+
+
+def split_values(text):
+    """'Vietnam, Indonesia' -> ['Vietnam', 'Indonesia']"""
+    return [v.strip() for v in text.split(",") if v.strip()]
+
+
+def parse_where(items):
+    """['country=Vietnam,Indonesia', 'max_ping=500', ...] -> query() keyword arguments
+
+    Comma separated values of one key are alternatives (OR), different keys all apply (AND).
+    anonymity is a minimum level, country matches by substring like the GUI filter.
+    """
+    query = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        name = name.strip().lower().replace("-", "_")
+        if name not in FIELDS + ("max_ping",) or not value:
+            raise ValueError(f"invalid filter {item!r}, expected KEY=VALUE with KEY in "
+                             f"{', '.join(FIELDS + ('max_ping',))}")
+        if name == "max_ping":
+            query[name] = int(value.rstrip("ms"))
+        elif name == "anonymity":
+            if value not in ANONYMITY_LEVELS:
+                raise ValueError(f"invalid anonymity {value!r}, expected one of {', '.join(ANONYMITY_LEVELS)}")
+            query[name] = value
+        else:
+            query[name] = split_values(value)
+    return query
+
+
+class ResultIndex:
+    """Live results indexed for instant filtering
+
+    Buckets per country / protocol / ASN / anonymity (sets of result ids) plus an array of
+    (ping, id) kept sorted as results arrive. A query intersects the buckets of every given
+    filter and walks the ping-sorted array, so matches come back fastest first.
+    """
+
+    def __init__(self, results=()):
+        self.results = []
+        self.buckets = {field: defaultdict(set) for field in FIELDS}
+        self.by_ping = []
+        self.lock = threading.Lock()
+        self.extend(results)
+
+    def __len__(self):
+        return len(self.results)
+
+    def _bucket(self, rid, result):
+        for field in FIELDS:
+            self.buckets[field][_key(field, result.get(field, ""))].add(rid)
+
+    def add(self, result):
+        """Index one result as it arrives (thread-safe), returns its id"""
+        with self.lock:
+            rid = len(self.results)
+            self.results.append(result)
+            self._bucket(rid, result)
+            insort(self.by_ping, (result["ping"], rid))
+            return rid
+
+    def extend(self, results):
+        """Index many results at once (one sort instead of an insert per result)"""
+        with self.lock:
+            start = len(self.results)
+            self.results.extend(results)
+            for rid in range(start, len(self.results)):
+                self._bucket(rid, self.results[rid])
+            # Timsort nối phần mới (đã sort) vào mảng cũ gần như tuyến tính
+            self.by_ping.extend(sorted((self.results[rid]["ping"], rid) for rid in range(start, len(self.results))))
+            self.by_ping.sort()
+
+    def clear(self):
+        with self.lock:
+            self.results = []
+            self.buckets = {field: defaultdict(set) for field in FIELDS}
+            self.by_ping = []
+
+    def values(self, field):
+        """Distinct values of field, most results first (for filter pickers)"""
+        with self.lock:
+            buckets = self.buckets[field]
+            return sorted((k for k in buckets if k), key=lambda k: -len(buckets[k]))
+
+    def _candidates(self, field, wanted):
+        buckets = self.buckets[field]
+        if field == "country":
+            terms = [w.lower() for w in wanted]
+            keys = [k for k in buckets if any(t in k for t in terms)]
+        elif field == "anonymity":
+            keys = ANONYMITY_LEVELS[ANONYMITY_LEVELS.index(wanted):]
+        else:
+            keys = {_key(field, w) for w in wanted}
+        ids = set()
+        for k in keys:
+            ids |= buckets.get(k, set())
+        return ids
+
+    def query(self, country=None, protocol=None, asn=None, anonymity=None, max_ping=None, limit=None):
+        """Matching results, fastest first
+
+        country / protocol / asn are lists of alternatives, anonymity a minimum level,
+        None skips a filter.
+        """
+        filters = {"country": country, "protocol": protocol, "asn": asn, "anonymity": anonymity}
+        with self.lock:
+            sets = sorted((self._candidates(field, wanted) for field, wanted in filters.items() if wanted), key=len)
+            end = len(self.by_ping) if max_ping is None else bisect_right(self.by_ping, (max_ping, len(self.results)))
+            if not sets:
+                ids = [rid for _, rid in self.by_ping[:end]]
+            else:
+                matched = sets[0].intersection(*sets[1:])
+                if len(matched) * 8 < end:
+                    # Ít kết quả: sort riêng thay vì duyệt cả mảng ping
+                    ids = sorted((rid for rid in matched if max_ping is None or self.results[rid]["ping"] <= max_ping),
+                                 key=lambda rid: (self.results[rid]["ping"], rid))
+                else:
+                    ids = [rid for _, rid in self.by_ping[:end] if rid in matched]
+            return [self.results[rid] for rid in ids[:limit]]
+
+    @staticmethod
+    def matches(result, country=None, protocol=None, asn=None, anonymity=None, max_ping=None):
+        """Same filters as query() for a single result (incremental view updates)"""
+        if country and not any(c.lower() in str(result.get("country", "")).lower() for c in country):
+            return False
+        if protocol and _key("protocol", result.get("protocol", "")) not in {_key("protocol", p) for p in protocol}:
+            return False
+        if asn and asn_of(result.get("asn")) not in {asn_of(a) for a in asn}:
+            return False
+        if not meets_anonymity(result.get("anonymity"), anonymity):
+            return False
+        return max_ping is None or result["ping"] <= max_ping
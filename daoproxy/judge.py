@@ -0,0 +1,41 @@
+import json
+import threading
+
+DEFAULT_PORT = 8088
+
+
+def serve(port=DEFAULT_PORT, host="0.0.0.0", block=True):
+    """Minimal judge: echoes the origin IP (ip-api "query") and request headers as JSON
+
+    Host it somewhere public and pass its URL as --judge to get anonymity classes;
+    ip-api does not echo headers, so only transparent proxies can be told apart there.
+    """
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = json.dumps({
+                "status": "success",
+                "query": self.client_address[0],
+                "headers": dict(self.headers.items()),
+                "method": self.command,
+                "path": self.path,
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    if block:
+        server.serve_forever()
+    else:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
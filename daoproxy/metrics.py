@@ -0,0 +1,148 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from .counters import StatsAggregator, BUCKETS, bucket_index, bucket_value
+
+# Pipeline stages; "connect" = TCP connect (+DNS) to the proxy/source, "request" = full judge request,
+# "json" = decoding the judge response, "verify" = extra verification profiles after the judge,
+# "throttle" = time spent waiting for a rate-limit token, "dns" = lookups that missed the DNS cache
+PHASES = ("fetch", "parse", "check", "connect", "dns", "request", "json", "verify", "throttle", "export")
+EVENTS = (
+    "fetch_ok", "fetch_errors", "fetch_bytes", "parsed_proxies",
+    "check_live", "check_dead", "check_timeouts", "check_errors", "verify_failed", "throttled", "requeued",
+    "dns_hits", "dns_misses", "exported",
+)
+# Prometheus histogram bounds (ms)
+BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+DEFAULT_PORT = 9108
+
+
+class Metrics(StatsAggregator):
+    """Per-phase timers and event counters for the whole process"""
+
+    def __init__(self, phases=PHASES, events=EVENTS):
+        keys = list(events)
+        for phase in phases:
+            keys += [f"{phase}_count", f"{phase}_us"]
+        super().__init__(keys, histograms=phases)
+        self.phases = tuple(phases)
+        self.events = tuple(events)
+        self.server = None
+        self.start()
+
+    def record(self, phase, seconds):
+        """Account one timed call of a phase"""
+        shard = self._shard()
+        shard[0][f"{phase}_count"] += 1
+        shard[0][f"{phase}_us"] += int(seconds * 1e6)
+        shard[1][phase][bucket_index(seconds * 1000)] += 1
+
+    @contextmanager
+    def timer(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def summary(self):
+        """Machine-readable snapshot: per-phase count/total/percentiles plus event counters"""
+        counts = self.counts()
+        phases = {}
+        for phase in self.phases:
+            n = counts[f"{phase}_count"]
+            if not n:
+                continue
+            total = counts[f"{phase}_us"] / 1e6
+            points = self.percentiles(phase)
+            phases[phase] = {
+                "count": n,
+                "total_s": round(total, 3),
+                "mean_ms": round(total * 1000 / n, 1),
+                "p50_ms": points[50],
+                "p90_ms": points[90],
+                "p99_ms": points[99],
+            }
+        return {
+            "elapsed_s": round(self.elapsed(), 3),
+            "phases": phases,
+            "events": {event: counts[event] for event in self.events},
+        }
+
+    def write_summary(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def prometheus(self, prefix="daoproxy"):
+        """Prometheus text exposition format"""
+        counts = self.counts()
+        lines = [f"# TYPE {prefix}_events_total counter"]
+        for event in self.events:
+            lines.append(f'{prefix}_events_total{{event="{event}"}} {counts[event]}')
+        lines.append(f"# TYPE {prefix}_phase_seconds histogram")
+        for phase in self.phases:
+            merged = self.histogram(phase)
+            cumulative = 0
+            index = 0
+            for bound in BOUNDS_MS:
+                while index < BUCKETS and bucket_value(index) <= bound:
+                    cumulative += merged[index]
+                    index += 1
+                lines.append(f'{prefix}_phase_seconds_bucket{{phase="{phase}",le="{bound / 1000}"}} {cumulative}')
+            lines.append(f'{prefix}_phase_seconds_bucket{{phase="{phase}",le="+Inf"}} {counts[f"{phase}_count"]}')
+            lines.append(f'{prefix}_phase_seconds_sum{{phase="{phase}"}} {counts[f"{phase}_us"] / 1e6}')
+            lines.append(f'{prefix}_phase_seconds_count{{phase="{phase}"}} {counts[f"{phase}_count"]}')
+        lines.append(f"# TYPE {prefix}_uptime_seconds gauge")
+        lines.append(f"{prefix}_uptime_seconds {round(self.elapsed(), 3)}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=DEFAULT_PORT, host="127.0.0.1"):
+        """Expose /metrics (Prometheus) and /summary (JSON) in a background thread"""
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = metrics.prometheus().encode()
+                    content_type = "text/plain; version=0.0.4"
+                elif self.path == "/summary":
+                    body = json.dumps(metrics.summary()).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server.server_address
+
+
+# Process-wide registry shared by Dao.py, checker.py and the GUI
+metrics = Metrics()
+
+
+def instrument_requests():
+    """Time TCP connects made by requests/urllib3 under the "connect" phase"""
+    import urllib3.util.connection as connection
+    if getattr(connection.create_connection, "_timed", False):
+        return
+    original = connection.create_connection
+
+    def create_connection(*args, **kwargs):
+        with metrics.timer("connect"):
+            return original(*args, **kwargs)
+
+    create_connection._timed = True
+    connection.create_connection = create_connection
@@ -0,0 +1,128 @@
+import os
+import mmap
+import multiprocessing
+import threading
+import concurrent.futures
+from array import array
+from collections import deque
+
+from .formats import parse_body, parse_chunk, parse_lines, detect_format
+
+INLINE_LIMIT = 256 * 1024      # Body nhỏ hơn -> parse ngay trong thread gọi
+CHUNK_SIZE = 4 * 1024 * 1024   # Body lớn được cắt theo dòng thành các chunk ~4MB
+
+
+def line_ranges(data, chunk_size=CHUNK_SIZE):
+    """(start, end) offsets of ~chunk_size pieces of data (bytes or mmap) cut on line boundaries"""
+    ranges = []
+    start = 0
+    while start < len(data):
+        end = data.find(b"\n", start + chunk_size)
+        end = len(data) if end == -1 else end + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def split_lines(data, chunk_size=CHUNK_SIZE):
+    """Split bytes into ~chunk_size pieces on line boundaries"""
+    view = memoryview(data)
+    return [view[start:end] for start, end in line_ranges(data, chunk_size)]
+
+
+def parse_file_range(path, start, end, protocol=0):
+    """Parse bytes [start, end) of a proxy file (mmapped here, so only offsets cross processes)"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return parse_lines(mm[start:end], protocol)
+
+
+def merge_sorted_unique(arrays):
+    """Merge packed arrays into one sorted unique array('Q')"""
+    merged = set()
+    for arr in arrays:
+        merged.update(arr)
+    return array("Q", sorted(merged))
+
+
+class ParsePool:
+    """Parse raw source bodies in a process pool
+
+    Small bodies are parsed inline, big ones are split on line boundaries and
+    spread across processes. Workers return packed, locally deduplicated
+    arrays so only compact data crosses the process boundary. Processes are
+    spawned by default: callers have fetch / UI threads running, fork is unsafe then.
+    """
+
+    def __init__(self, workers=None, inline_limit=INLINE_LIMIT, chunk_size=CHUNK_SIZE, mp_context=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.inline_limit = inline_limit
+        self.chunk_size = chunk_size
+        self.mp_context = mp_context or multiprocessing.get_context("spawn")
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def _executor(self):
+        # Chỉ tạo process pool khi thật sự gặp body lớn
+        with self.lock:
+            if self.executor is None:
+                self.executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=self.mp_context
+                )
+            return self.executor
+
+    def parse(self, body, fmt=None, protocol=0):
+        """bytes -> (unique array('Q'), proxies without a packed key: IPv6 / credentials)
+
+        fmt None sniffs the body (see formats.detect_format), protocol is the source's
+        protocol code applied to proxies that carry none. The array is sorted when the
+        body was split across processes.
+        """
+        fmt = fmt or detect_format(body)
+        if self.workers <= 1 or len(body) < self.inline_limit:
+            return parse_body(body, fmt, protocol)
+        if fmt != "lines":
+            # JSON / CSV / HTML không cắt theo dòng được: cả body là một task
+            return self._executor().submit(parse_body, bytes(body), fmt, protocol).result()
+        chunks = [bytes(c) for c in split_lines(body, self.chunk_size)]
+        if len(chunks) == 1:
+            chunks = [bytes(c) for c in split_lines(body, max(len(body) // self.workers, 1))]
+        results = list(self._executor().map(parse_chunk, chunks, [protocol] * len(chunks)))
+        extra = list(dict.fromkeys(proxy for _, chunk_extra in results for proxy in chunk_extra))
+        return merge_sorted_unique(packed for packed, _ in results), extra
+
+    def iter_file(self, path, protocol=0):
+        """Yield (unique array('Q'), other proxies) for each ~chunk_size piece of a proxy file, in file order
+
+        The file is mmapped and cut on line boundaries. With several pieces they are parsed in
+        the process pool, at most two per worker in flight, so the first piece comes back while
+        the rest of the file is still being read.
+        """
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                ranges = line_ranges(mm, self.chunk_size)
+                if self.workers <= 1 or len(ranges) == 1:
+                    for start, end in ranges:
+                        yield parse_lines(mm[start:end], protocol)
+                    return
+        executor = self._executor()
+        in_flight = deque()
+        for start, end in ranges:
+            in_flight.append(executor.submit(parse_file_range, path, start, end, protocol))
+            if len(in_flight) >= 2 * self.workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+    def close(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,131 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from .metrics import metrics
+
+SOURCE_RATE = 5.0           # Request/s tới mỗi host nguồn (raw.githubusercontent.com, ...)
+SOURCE_BURST = 10
+RETRY_STATUSES = (429, 503)
+MAX_RETRY_AFTER = 60        # Giây, chặn Retry-After quá dài
+DEFAULT_RETRY_AFTER = 1     # Khi 429 không kèm Retry-After (nhân đôi mỗi lần thử lại)
+
+
+def retry_after(response, attempt=0):
+    """Seconds to back off after a 429/503 (Retry-After, ip-api's X-Ttl, else exponential)"""
+    value = response.headers.get("Retry-After") or response.headers.get("X-Ttl")
+    seconds = None
+    if value:
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                pass
+    if seconds is None:
+        seconds = DEFAULT_RETRY_AFTER * 2 ** attempt
+    return min(max(seconds, 0), MAX_RETRY_AFTER)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; rate=None means unlimited (only Retry-After pauses apply)
+
+    Tokens may go negative: each caller reserves its slot and sleeps outside the lock,
+    so waiting threads are released in order, `rate` per second.
+    """
+
+    def __init__(self, rate=None, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate or 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        # updated ở tương lai = đang bị pause, chưa nạp token
+        if self.rate and now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def reserve(self):
+        """Take a token, returns seconds to wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            if not self.rate:
+                return max(0.0, self.updated - now)
+            self._refill(now)
+            self.tokens -= 1
+            return max(0.0, self.updated - now) + max(0.0, -self.tokens / self.rate)
+
+    def pause(self, seconds):
+        """No tokens for the next `seconds` (Retry-After), refill resumes afterwards"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+            self.updated = max(self.updated, now + seconds)
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def limit_key(url):
+    """'http://host:8080/x' -> 'host:8080' (scheme's default port if none), bare 'host' stays as is
+
+    Same host on another port (judge and a source on one server) gets its own bucket.
+    """
+    parts = urlsplit(url)
+    if not parts.hostname:
+        return url
+    try:
+        port = parts.port or DEFAULT_PORTS.get(parts.scheme)
+    except ValueError:
+        port = None
+    host = f"[{parts.hostname}]" if ":" in parts.hostname else parts.hostname
+    return f"{host}:{port}" if port else host
+
+
+class RateLimiter:
+    """Token buckets per destination host:port, shared by every thread in the process"""
+
+    def __init__(self, limits=None):
+        self.limits = dict(limits or {})  # limit_key -> (rate, burst)
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def set_limit(self, url, rate, burst=None):
+        """rate requests/s to url's host:port (None / 0 = unlimited), replaces any existing bucket"""
+        host = limit_key(url)
+        with self.lock:
+            self.limits[host] = (rate or None, burst)
+            self.buckets[host] = TokenBucket(rate or None, burst)
+
+    def bucket(self, url, rate=None, burst=None):
+        """Bucket of url's host:port; rate/burst are defaults for ones without set_limit"""
+        host = limit_key(url)
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            with self.lock:
+                bucket = self.buckets.get(host)
+                if bucket is None:
+                    rate, burst = self.limits.get(host, (rate, burst))
+                    bucket = self.buckets[host] = TokenBucket(rate, burst)
+        return bucket
+
+    def wait(self, url, rate=None, burst=None):
+        """Block until a request to url's host:port is allowed"""
+        delay = self.bucket(url, rate, burst).reserve()
+        if delay > 0:
+            metrics.record("throttle", delay)
+            time.sleep(delay)
+
+    def backoff(self, url, seconds):
+        """Pause every request to url's host:port (429 / Retry-After)"""
+        metrics.incr("throttled")
+        self.bucket(url).pause(seconds)
+
+
+# Process-wide limiter: Dao.py, checker.py and the GUI share the same per-host budgets
+limiter = RateLimiter()
@@ -0,0 +1,167 @@
+import threading
+from collections import defaultdict
+from itertools import chain, zip_longest
+
+from .index import asn_of
+from .validate import split_proxy
+
+# Proxy đầu tiên của mỗi nhóm được check trước; nhóm nhỏ hơn MIN_GROUP thì check hết
+SAMPLE_SIZE = 4
+MIN_GROUP = 10
+FULL_RATIO = 0.5  # Tỉ lệ live >= mức này -> mở hết phần còn lại của nhóm, không chia đợt
+
+
+def subnet_of(host):
+    """'1.2.3.4' -> '1.2.3' (/24), '2001:db8:1:2::5' -> '2001:db8:1:2' (/64), hostname -> itself"""
+    if ":" in host:
+        from ipaddress import IPv6Address
+        return ":".join(IPv6Address(host).exploded.split(":")[:4])
+    head, _, last = host.rpartition(".")
+    return head if last.isdigit() else host
+
+
+def host_of(proxy):
+    return split_proxy(proxy)[2]
+
+
+def asn_map_from(results):
+    """{subnet: 'AS..'} from earlier result dicts (host or ip + asn), for grouping /24s of one provider"""
+    asns = {}
+    for result in results:
+        asn = asn_of(result.get("asn"))
+        host = result.get("host") or result.get("ip")  # check_many: host, checker.py: ip
+        if asn and host:
+            asns[subnet_of(host)] = asn
+    return asns
+
+
+class _Group:
+    __slots__ = ("queue", "wave", "wave_live", "checked", "live", "dead")
+
+    def __init__(self, queue):
+        self.queue = queue      # Chưa check, xen kẽ giữa các IP của nhóm
+        self.wave = 0           # Số proxy của đợt hiện tại chưa có kết quả
+        self.wave_live = 0
+        self.checked = 0
+        self.live = 0
+        self.dead = False       # Một đợt chết hết -> phần còn lại (kể cả proxy thêm sau) bị bỏ
+
+
+class GroupSampler:
+    """Checks a sample of every IP / subnet / ASN group first, then expands or skips the rest
+
+    Proxies are grouped by IP when one IP has at least min_group of them (many ports on one
+    host), otherwise by /24 (/64 for IPv6), or by ASN for subnets in asn_map. Groups smaller
+    than min_group are checked in full. Of the others only `sample` proxies (spread over the
+    group's IPs) go first; when a wave is done the group gets a wave as big as everything
+    checked so far if the wave found a live proxy, all of the rest if its live ratio reached
+    FULL_RATIO, and nothing more if the wave was all dead.
+
+    start() returns the first wave in input (priority) order; record(proxy, alive) is called
+    once per checked proxy, from any thread, and passes released proxies to submit(list).
+    add(proxies) groups a later batch (streamed input) into the same groups and returns
+    (proxies to check now, proxies skipped because their group already came back all dead).
+    """
+
+    def __init__(self, proxies, submit, sample=SAMPLE_SIZE, min_group=MIN_GROUP, asn_map=None):
+        self.proxies = proxies
+        self.submit = submit
+        self.sample = max(1, sample)
+        self.min_group = max(min_group, self.sample + 1)
+        self.asn_map = asn_map or {}
+        self.groups = {}
+        self.group_of = {}
+        self.skipped = 0
+        self.skipped_groups = 0
+        self.per_host = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def _key(self, host):
+        if self.per_host[host] >= self.min_group:
+            return host
+        subnet = subnet_of(host)
+        return self.asn_map.get(subnet, subnet)
+
+    def start(self):
+        return self.add(self.proxies)[0]
+
+    def add(self, proxies):
+        """Group a batch of proxies -> (the ones to check now in input order, number skipped)"""
+        hosts = [host_of(proxy) for proxy in proxies]
+        with self.lock:
+            for host in hosts:
+                self.per_host[host] += 1
+            members = defaultdict(lambda: defaultdict(list))  # group -> host -> proxies
+            for proxy, host in zip(proxies, hosts):
+                members[self._key(host)][host].append(proxy)
+
+            first = set()
+            skipped = 0
+            for key, by_host in members.items():
+                # Xen kẽ các IP để mẫu phủ nhiều IP nhất có thể
+                queue = [p for p in chain.from_iterable(zip_longest(*by_host.values())) if p is not None]
+                group = self.groups.get(key)
+                if group is None:
+                    if len(queue) < self.min_group:
+                        first.update(queue)
+                        continue
+                    group = self.groups[key] = _Group(queue[self.sample:])
+                    group.wave = self.sample
+                    first.update(queue[:self.sample])
+                elif group.dead:
+                    skipped += len(queue)
+                    continue
+                elif group.wave:
+                    group.queue.extend(queue)  # Đang chờ kết quả đợt hiện tại
+                else:
+                    # Nhóm đã có proxy live và hết hàng đợi -> check luôn phần mới như một đợt
+                    group.wave = len(queue)
+                    group.wave_live = 0
+                    first.update(queue)
+                for proxy in queue:
+                    self.group_of[proxy] = group
+            self.skipped += skipped
+        return [proxy for proxy in proxies if proxy in first], skipped
+
+    def record(self, proxy, alive):
+        """Count one result; may release the group's next wave through submit, returns proxies skipped"""
+        group = self.group_of.get(proxy)
+        if group is None:
+            return 0
+        with self.lock:
+            group.checked += 1
+            group.wave -= 1
+            if alive:
+                group.live += 1
+                group.wave_live += 1
+            if group.wave:
+                return 0
+            group.dead = not group.wave_live
+            if not group.queue:
+                return 0
+            skipped = 0
+            if group.dead:
+                skipped = len(group.queue)
+                self.skipped += skipped
+                self.skipped_groups += 1
+                release = []
+            elif group.live >= group.checked * FULL_RATIO:
+                release = group.queue
+            else:
+                release = group.queue[:group.checked]
+            group.queue = group.queue[len(release):] if release else []
+            group.wave = len(release)
+            group.wave_live = 0
+        if release:
+            self.submit(release)
+        return skipped
+
+    def stats(self):
+        """{'groups', 'grouped' (proxies in sampled groups), 'skipped', 'skipped_groups'}"""
+        with self.lock:
+            return {
+                "groups": len(self.groups),
+                "grouped": len(self.group_of),
+                "skipped": self.skipped,
+                "skipped_groups": self.skipped_groups,
+            }
@@ -0,0 +1,59 @@
+import math
+
+PREVIOUS_LIVE_FILE = "live_proxies.txt"
+
+# Trọng số điểm ưu tiên
+WEIGHT_PREVIOUS_LIVE = 10.0
+WEIGHT_SOURCES = 1.0
+WEIGHT_SOURCE_QUALITY = 5.0
+WEIGHT_NEW = 3.0               # Chưa từng check (không có trong SeenFilter) > đã check mà chết
+DEFAULT_SOURCE_QUALITY = 0.05  # Nguồn chưa có số liệu
+
+
+def load_previous_live(path=PREVIOUS_LIVE_FILE):
+    """Load proxies that were alive in the previous run"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {line.strip() for line in f if line.strip()}
+    except OSError:
+        return set()
+
+
+def source_quality(sources, source_stats):
+    """Best live ratio among the sources that listed a proxy"""
+    if source_stats is None or not sources:
+        return DEFAULT_SOURCE_QUALITY
+    ratios = [source_stats.live_ratio(url) for url in sources]
+    ratios = [r for r in ratios if r is not None]
+    return max(ratios) if ratios else DEFAULT_SOURCE_QUALITY
+
+
+def prior_score(proxy, previous_live=(), proxy_sources=None, source_stats=None, quality_cache=None, seen=None):
+    """Prior score that a proxy is alive (higher = check first)"""
+    sources = proxy_sources.get(proxy, ()) if proxy_sources else ()
+    if quality_cache is None:
+        quality = source_quality(sources, source_stats)
+    else:
+        # Nhiều proxy có cùng bộ nguồn, cache để không tính lại
+        key = tuple(sources)
+        quality = quality_cache.get(key)
+        if quality is None:
+            quality = quality_cache[key] = source_quality(sources, source_stats)
+    score = WEIGHT_SOURCE_QUALITY * quality
+    # Proxy được nhiều nguồn độc lập liệt kê thường còn sống
+    score += WEIGHT_SOURCES * math.log2(1 + len(sources))
+    if proxy in previous_live:
+        score += WEIGHT_PREVIOUS_LIVE
+    elif seen is not None and proxy not in seen:
+        score += WEIGHT_NEW
+    return score
+
+
+def prioritize(proxies, previous_live=(), proxy_sources=None, source_stats=None, seen=None):
+    """Order proxies so the most likely live ones are checked first"""
+    quality_cache = {}
+    return sorted(
+        proxies,
+        key=lambda p: prior_score(p, previous_live, proxy_sources, source_stats, quality_cache, seen),
+        reverse=True
+    )
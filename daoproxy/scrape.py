@@ -0,0 +1,127 @@
+import sys
+import time
+import threading
+import concurrent.futures
+from collections import defaultdict
+
+from .metrics import metrics
+from .formats import ADDRESS_MASK, source_hints, unpack
+from .parse_pool import ParsePool
+from .ratelimit import limiter, retry_after, RETRY_STATUSES, SOURCE_RATE, SOURCE_BURST
+
+FETCH_TIMEOUT = 10
+FETCH_WORKERS = 16
+FETCH_RETRIES = 2  # Thử lại sau 429 / 503
+POOL_HOSTS = 64    # Số host giữ kết nối keep-alive
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def fetch_session():
+    """Process-wide requests.Session for sources: connections stay open across scrapes"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=FETCH_WORKERS)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def fetch_source(url, timeout=FETCH_TIMEOUT, rate=SOURCE_RATE, retries=FETCH_RETRIES):
+    """GET url within the host's rate limit, returns (status_code, body bytes)
+
+    429 / 503 pause the whole host for Retry-After, then the request is retried.
+    """
+    session = fetch_session()
+    for attempt in range(retries + 1):
+        limiter.wait(url, rate, SOURCE_BURST)
+        with metrics.timer("fetch"):
+            response = session.get(url, timeout=timeout)
+            body = response.content
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response.status_code, body
+        limiter.backoff(url, retry_after(response, attempt))
+
+
+def _fetch_and_parse(url, timeout, pool, rate):
+    """Returns (packed array, IPv6 / credential proxies, fetch_ms, error or None)"""
+    start = time.time()
+    try:
+        status, body = fetch_source(url, timeout, rate)
+        if status != 200:
+            metrics.incr("fetch_errors")
+            return (), (), int((time.time() - start) * 1000), f"HTTP {status}"
+        metrics.incr("fetch_ok")
+        metrics.incr("fetch_bytes", len(body))
+        fmt, protocol = source_hints(url)
+        with metrics.timer("parse"):
+            packed, extra = pool.parse(body, fmt, protocol)
+        metrics.incr("parsed_proxies", len(packed) + len(extra))
+        return packed, extra, int((time.time() - start) * 1000), None
+    except Exception as e:
+        metrics.incr("fetch_errors")
+        return (), (), int((time.time() - start) * 1000), str(e) or type(e).__name__
+
+
+def scrape_sources(sites, workers=FETCH_WORKERS, timeout=FETCH_TIMEOUT, source_stats=None,
+                   on_source=None, pool=None, rate=SOURCE_RATE):
+    """Fetch and parse every site, returns dict proxy -> set of source urls
+
+    Sites are fetched on `workers` threads, at most `rate` requests/s per host; results are
+    merged and on_source(url, added, error) is called in the calling thread as each site
+    completes (added = proxies new to this run, error = None on success). A ParsePool is
+    created for the call unless one is passed in.
+
+    Proxies whose source gave a protocol come back as 'socks5://ip:port', credentials as
+    'user:pass@ip:port', IPv6 as '[addr]:port' (compressed); a bare proxy also listed with
+    a protocol is merged into it.
+    """
+    own_pool = pool is None
+    if own_pool:
+        pool = ParsePool()
+    packed_sources = defaultdict(set)  # Key (ip:port đã pack) tự động loại trùng, value = nguồn
+    extra_sources = defaultdict(set)   # IPv6 / user:pass (không vừa key pack), chuỗi đã chuẩn hoá
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(workers, len(sites)))) as executor:
+            futures = {executor.submit(_fetch_and_parse, url, timeout, pool, rate): url for url in sites}
+            for future in concurrent.futures.as_completed(futures):
+                url = futures[future]
+                packed, extra, fetch_ms, error = future.result()
+                count_before = len(packed_sources) + len(extra_sources)
+                for key in packed:
+                    packed_sources[key].add(url)
+                for proxy in extra:
+                    extra_sources[sys.intern(proxy)].add(url)
+                if source_stats is not None:
+                    source_stats.record_fetch(url, len(packed) + len(extra), fetch_ms, error is None)
+                if on_source is not None:
+                    on_source(url, len(packed_sources) + len(extra_sources) - count_before, error)
+    finally:
+        if own_pool:
+            pool.close()
+
+    # ip:port không rõ giao thức mà nguồn khác ghi rõ (socks5://ip:port) -> gộp vào bản có giao thức
+    hinted = defaultdict(list)
+    for key in packed_sources:
+        if key > ADDRESS_MASK:
+            hinted[key & ADDRESS_MASK].append(key)
+    for address, keys in hinted.items():
+        urls = packed_sources.pop(address, None)
+        if urls:
+            for key in keys:
+                packed_sources[key] |= urls
+    for proxy in [p for p in extra_sources if "://" in p]:
+        urls = extra_sources.pop(proxy.partition("://")[2], None)
+        if urls:
+            extra_sources[proxy] |= urls
+
+    proxy_sources = {unpack(key): urls for key, urls in packed_sources.items()}
+    proxy_sources.update(extra_sources)
+    if source_stats is not None:
+        source_stats.record_attribution(proxy_sources)
+    return proxy_sources
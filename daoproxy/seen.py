@@ -0,0 +1,162 @@
+import math
+import mmap
+import os
+import struct
+import time
+from hashlib import blake2b
+
+SEEN_FILE = "seen_proxies.bloom"
+CAPACITY = 1000000      # Proxy mỗi thế hệ trước khi xoay vòng
+ERROR_RATE = 0.001      # Tỉ lệ dương tính giả mục tiêu của mỗi thế hệ
+GENERATIONS = 2         # Proxy không gặp lại trong N thế hệ sẽ bị quên
+ROTATE_DAYS = 7         # Thế hệ hiện tại cũ hơn N ngày -> xoay vòng
+
+MAGIC = b"DAOSEEN1"
+HEADER = struct.Struct("<8sQIII")   # magic, bits per generation, hashes, generations, current
+SLOT = struct.Struct("<dQ")         # created, count
+
+
+def bloom_size(capacity, error_rate):
+    """(bits, hashes) for capacity items at error_rate"""
+    bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    bits = (bits + 63) // 64 * 64
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+class SeenFilter:
+    """Rotating Bloom filter of proxies seen in earlier runs, mmap'd from disk
+
+    A ring of `generations` Bloom filters: add() writes to the current one, lookups
+    check all of them. The oldest generation is cleared and reused once the current
+    one holds `capacity` proxies or is older than rotate_days, so proxies that stop
+    showing up age out. An existing file with a different layout is started over.
+    """
+
+    def __init__(self, path=SEEN_FILE, capacity=CAPACITY, error_rate=ERROR_RATE,
+                 generations=GENERATIONS, rotate_days=ROTATE_DAYS):
+        self.path = path
+        self.capacity = capacity
+        self.rotate_days = rotate_days
+        self.bits, self.hashes = bloom_size(capacity, error_rate)
+        self.generations = generations
+        self.slot_bytes = self.bits // 8
+        self.data_offset = HEADER.size + SLOT.size * generations
+        self._open()
+
+    def _open(self):
+        size = self.data_offset + self.slot_bytes * self.generations
+        fresh = not os.path.exists(self.path) or os.path.getsize(self.path) != size
+        if not fresh:
+            with open(self.path, "rb") as f:
+                magic, bits, hashes, generations, _ = HEADER.unpack(f.read(HEADER.size))
+            fresh = (magic, bits, hashes, generations) != (MAGIC, self.bits, self.hashes, self.generations)
+        if fresh:
+            with open(self.path, "wb") as f:
+                f.truncate(size)
+        self.file = open(self.path, "r+b")
+        self.mm = mmap.mmap(self.file.fileno(), size)
+        if fresh:
+            HEADER.pack_into(self.mm, 0, MAGIC, self.bits, self.hashes, self.generations, 0)
+            SLOT.pack_into(self.mm, HEADER.size, time.time(), 0)
+        self.current = HEADER.unpack_from(self.mm, 0)[4]
+        self.created, self.count = SLOT.unpack_from(self.mm, HEADER.size + SLOT.size * self.current)
+        self.added = 0
+        self.maybe_rotate()
+
+    def _positions(self, proxy):
+        digest = blake2b(proxy.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        bits = self.bits
+        return [(h1 + i * h2) % bits for i in range(self.hashes)]
+
+    def _in_slot(self, slot, positions):
+        mm = self.mm
+        base = self.data_offset + slot * self.slot_bytes
+        for pos in positions:
+            if not mm[base + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def __contains__(self, proxy):
+        positions = self._positions(proxy)
+        return any(self._in_slot(slot, positions) for slot in self._slots())
+
+    def _slots(self):
+        # Thế hệ hiện tại trước, thường trúng sớm nhất
+        return [(self.current - i) % self.generations for i in range(self.generations)]
+
+    def add(self, proxy):
+        """Mark proxy as seen, returns True if it was not seen before"""
+        positions = self._positions(proxy)
+        new = not any(self._in_slot(slot, positions) for slot in self._slots())
+        mm = self.mm
+        base = self.data_offset + self.current * self.slot_bytes
+        added = False
+        for pos in positions:
+            index = base + (pos >> 3)
+            bit = 1 << (pos & 7)
+            byte = mm[index]
+            if not byte & bit:
+                mm[index] = byte | bit
+                added = True
+        if added:
+            # Chỉ đếm phần tử mới của thế hệ hiện tại (gặp lại từ thế hệ cũ cũng được chép sang)
+            self.count += 1
+            self.added += 1
+            if self.count >= self.capacity:
+                self.rotate()
+        return new
+
+    def split_new(self, proxies):
+        """(new, seen) lists without marking anything"""
+        new, seen = [], []
+        for proxy in proxies:
+            (seen if proxy in self else new).append(proxy)
+        return new, seen
+
+    def maybe_rotate(self, now=None):
+        now = time.time() if now is None else now
+        if self.count >= self.capacity or now - self.created >= self.rotate_days * 86400:
+            self.rotate(now)
+
+    def rotate(self, now=None):
+        """Clear the oldest generation and make it current"""
+        self._save_slot()
+        self.current = (self.current + 1) % self.generations
+        base = self.data_offset + self.current * self.slot_bytes
+        self.mm[base:base + self.slot_bytes] = bytes(self.slot_bytes)
+        self.created, self.count = time.time() if now is None else now, 0
+        HEADER.pack_into(self.mm, 0, MAGIC, self.bits, self.hashes, self.generations, self.current)
+        self._save_slot()
+
+    def _save_slot(self):
+        SLOT.pack_into(self.mm, HEADER.size + SLOT.size * self.current, self.created, self.count)
+
+    def stats(self):
+        """Item count and creation time per generation, current first"""
+        rows = []
+        for slot in self._slots():
+            created, count = SLOT.unpack_from(self.mm, HEADER.size + SLOT.size * slot)
+            if slot == self.current:
+                created, count = self.created, self.count
+            rows.append({"generation": slot, "created": created, "count": count})
+        return rows
+
+    def flush(self):
+        self._save_slot()
+        self.mm.flush()
+
+    def close(self):
+        if self.mm.closed:
+            return
+        self.flush()
+        self.mm.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
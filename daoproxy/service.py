@@ -0,0 +1,260 @@
+"""Long-running scrape -> check loop: python -m daoproxy service [--config service.json]
+
+One process instead of `Dao.py` + `checker.py` from cron: imports, the parse pool, source
+fetch connections, the DNS cache, source stats and the live pool stay warm between cycles.
+The config file (JSON, every key optional) is re-read whenever it changes:
+
+    {"interval": 300, "extra_sources": ["https://example.com/proxies.txt"], "auto_tune": true,
+     "threads": 200, "timeout": 8, "where": ["max_ping=1500"], "output_dir": "live", "split": true}
+
+Each cycle's results are written to output_dir through temp files + os.replace, so readers
+always get a complete list; status.json is replaced last and says which cycle they are from.
+"""
+import json
+import os
+import threading
+import time
+
+from .check import check_many, parse_profile, probe_judge, JUDGE_URL, CHECK_TIMEOUT, FAST_TIMEOUT, ANONYMITY_LEVELS
+from .export import write_proxy_list, save_results, export_json
+from .index import ResultIndex, parse_where
+from .parse_pool import ParsePool
+from .ratelimit import limiter, limit_key, SOURCE_RATE, SOURCE_BURST
+from .scheduler import prioritize
+from .scrape import scrape_sources, FETCH_WORKERS, FETCH_TIMEOUT
+from .seen import SeenFilter
+from .source_stats import SourceStats, save_proxy_sources
+from .sources import RAW_PROXY_SITES
+from . import dnscache
+
+SERVICE_CONFIG_FILE = "service.json"
+RELOAD_POLL = 5  # Giây: khi chờ chu kỳ sau, đọc lại config mỗi N giây (interval mới áp dụng ngay)
+
+DEFAULT_CONFIG = {
+    "interval": 300,            # Giây giữa hai lần bắt đầu chu kỳ
+    "sources": None,            # None = RAW_PROXY_SITES
+    "extra_sources": [],
+    "auto_tune": False,
+    "fetch_workers": FETCH_WORKERS,
+    "fetch_timeout": FETCH_TIMEOUT,
+    "source_rate": SOURCE_RATE,  # 0 = không giới hạn
+    "threads": 100,
+    "timeout": CHECK_TIMEOUT,
+    "fast_timeout": FAST_TIMEOUT,
+    "judge": JUDGE_URL,
+    "judge_rate": 0,
+    "verify": [],               # Như checker --verify
+    "min_anonymity": None,
+    "where": [],                # Chỉ publish kết quả khớp, như checker --where
+    "output_dir": "live",
+    "split": False,             # Thêm live_<protocol>.txt / live_<Country>.txt
+    "seen_filter": None,        # File Bloom filter, None = tắt
+}
+
+
+def load_config(path=None):
+    """DEFAULT_CONFIG updated from the JSON file at path (None = defaults), raises OSError / ValueError
+
+    Adds "profiles" (parsed verify) and "query" (parsed where) for the cycle.
+    """
+    config = dict(DEFAULT_CONFIG)
+    if path is not None:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("config must be a JSON object")
+        unknown = sorted(set(data) - set(DEFAULT_CONFIG))
+        if unknown:
+            raise ValueError(f"unknown config keys: {', '.join(unknown)}")
+        config.update(data)
+    if not config["interval"] > 0:
+        raise ValueError("interval must be > 0")
+    if config["min_anonymity"] not in (None,) + ANONYMITY_LEVELS:
+        raise ValueError(f"min_anonymity must be one of {', '.join(ANONYMITY_LEVELS)}")
+    config["profiles"] = [parse_profile(spec) for spec in config["verify"]]
+    config["query"] = parse_where(config["where"])
+    return config
+
+
+class Service:
+    """Scrape / check cycles every config interval until stop()
+
+    Kept between cycles: the ParsePool, SourceStats, the seen filter and the live pool (results
+    of the last cycle). Live proxies are checked again first even when no source lists them
+    any more, and only the ones still alive are published.
+    """
+
+    def __init__(self, config_path=SERVICE_CONFIG_FILE, log=None):
+        self.config_path = config_path
+        self.log = log or (lambda message: None)
+        self.config = None
+        self.config_mtime = None
+        self.pool = ParsePool()
+        self.source_stats = SourceStats()
+        self.seen = None
+        self.live = {}  # proxy -> result của chu kỳ trước
+        self.published = []
+        self.cycles = 0
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()  # Guards source_stats and seen (check threads)
+
+    def reload(self):
+        """Re-read the config file if it changed, returns True if a new config is in use
+
+        A missing file means defaults; a broken file keeps the running config (raises only if
+        there is none yet).
+        """
+        try:
+            mtime = os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self.config is not None and mtime == self.config_mtime:
+            return False
+        try:
+            config = load_config(self.config_path if mtime is not None else None)
+        except (OSError, ValueError) as e:
+            if self.config is None:
+                raise
+            self.config_mtime = mtime
+            self.log(f"config {self.config_path} not reloaded, keeping the last one: {e}")
+            return False
+        if self.config is not None:
+            self.log(f"config {self.config_path} reloaded")
+        self.config_mtime = mtime
+        self._apply(config)
+        self.config = config
+        return True
+
+    def _apply(self, config):
+        # limiter.bucket chỉ dùng rate lúc tạo bucket -> source_rate mới phải đặt lại cho từng host:port nguồn.
+        # Nguồn nằm trên host:port của judge / profile thì theo judge_rate, không chặn các thread check
+        check_keys = {limit_key(url) for url in [config["judge"]] + [p.url for p in config["profiles"]]}
+        if self.config is None or config["source_rate"] != self.config["source_rate"]:
+            sites = list(config["sources"] or RAW_PROXY_SITES) + config["extra_sources"]
+            for key, url in {limit_key(url): url for url in sites}.items():
+                if key not in check_keys:
+                    limiter.set_limit(url, config["source_rate"], SOURCE_BURST)
+        limiter.set_limit(config["judge"], config["judge_rate"])
+        dnscache.install(dnscache.hosts_of([config["judge"]] + [p.url for p in config["profiles"]]))
+        old_path = self.seen.path if self.seen is not None else None
+        if config["seen_filter"] != old_path:
+            if self.seen is not None:
+                self.seen.close()
+            self.seen = SeenFilter(config["seen_filter"]) if config["seen_filter"] else None
+
+    def run_cycle(self):
+        """One scrape + check + publish, returns the status dict (None if stopped midway)"""
+        config = self.config
+        started = time.time()
+        sites = list(config["sources"] or RAW_PROXY_SITES) + config["extra_sources"]
+        if config["auto_tune"]:
+            sites, skipped = self.source_stats.plan(sites)
+            if skipped:
+                self.log(f"auto-tune: skipping {len(skipped)} sources")
+        dnscache.install(dnscache.hosts_of(sites))
+        proxy_sources = scrape_sources(sites, config["fetch_workers"], config["fetch_timeout"], self.source_stats,
+                                       pool=self.pool, rate=config["source_rate"] or None)
+        # Live pool của chu kỳ trước được check lại kể cả khi không nguồn nào còn liệt kê
+        proxies = list(proxy_sources) + [p for p in self.live if p not in proxy_sources]
+        proxies = prioritize(proxies, self.live, proxy_sources, self.source_stats, self.seen)
+        scraped_at = time.time()
+        if self.stopping.is_set():
+            return None
+
+        def on_result(proxy, result):
+            with self.lock:
+                if self.seen is not None:
+                    self.seen.add(proxy)
+                if proxy in proxy_sources:
+                    self.source_stats.record_check(proxy_sources[proxy], result is not None,
+                                                   result["ping"] if result else None)
+
+        real_ip, _ = probe_judge(config["judge"], config["timeout"])
+        results = check_many(proxies, config["timeout"], config["threads"], None, config["judge"], on_result,
+                             stop=self.stopping, profiles=config["profiles"], real_ip=real_ip,
+                             min_anonymity=config["min_anonymity"], fast_timeout=config["fast_timeout"])
+        if self.stopping.is_set():
+            return None  # Kết quả dở dang: giữ nguyên bản đã publish
+        self.live = {r["proxy"]: r for r in results}
+        self.cycles += 1
+        status = {
+            "cycle": self.cycles,
+            "started": round(started, 3),
+            "finished": None,
+            "sources": len(sites),
+            "scraped": len(proxy_sources),
+            "checked": len(proxies),
+            "live": len(results),
+            "published": 0,
+            "scrape_seconds": round(scraped_at - started, 2),
+            "check_seconds": round(time.time() - scraped_at, 2),
+        }
+        self.publish(results, status)
+        save_proxy_sources(proxy_sources)
+        self.source_stats.save()
+        if self.seen is not None:
+            self.seen.flush()
+        return status
+
+    def publish(self, results, status):
+        """Write the live list (filtered by config where, fastest first), then status.json"""
+        config = self.config
+        directory = config["output_dir"]
+        os.makedirs(directory, exist_ok=True)
+        results = ResultIndex(results).query(**config["query"])
+        if config["split"]:
+            paths = save_results(results, directory)
+        else:
+            paths = [os.path.join(directory, "live_proxies.txt")]
+            write_proxy_list((r["proxy"] for r in results), paths[0])
+        paths.append(os.path.join(directory, "live_proxies.json"))
+        export_json(results, paths[-1])
+        # File split của chu kỳ trước không còn proxy nào (vd. một quốc gia) -> xoá, tránh list cũ
+        for path in set(self.published) - set(paths):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.published = paths
+        status.update(published=len(results), finished=round(time.time(), 3))
+        export_json(status, os.path.join(directory, "status.json"))
+
+    def run(self, cycles=0):
+        """Run a cycle every interval (start to start) until stop() or `cycles` cycles, then close()
+
+        Returns the number of cycles published.
+        """
+        runs = 0
+        try:
+            self.reload()
+            while not self.stopping.is_set():
+                started = time.time()
+                runs += 1
+                try:
+                    status = self.run_cycle()
+                except Exception as e:
+                    status = None
+                    self.log(f"cycle failed: {type(e).__name__}: {e}")
+                if status is not None:
+                    self.log(f"cycle {status['cycle']}: {status['live']}/{status['checked']} live, "
+                             f"{status['published']} published in {status['finished'] - status['started']:.1f}s")
+                if cycles and runs >= cycles:
+                    break
+                # Chờ tới chu kỳ sau, đọc lại config trong lúc chờ
+                while not self.stopping.wait(min(RELOAD_POLL, max(0, started + self.config["interval"] - time.time()))):
+                    self.reload()
+                    if time.time() >= started + self.config["interval"]:
+                        break
+        finally:
+            self.close()
+        return self.cycles
+
+    def stop(self):
+        """Finish quickly: queued checks are skipped and the unfinished cycle is not published"""
+        self.stopping.set()
+
+    def close(self):
+        self.pool.close()
+        self.source_stats.save()
+        if self.seen is not None:
+            self.seen.close()
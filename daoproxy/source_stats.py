@@ -0,0 +1,167 @@
+import json
+import os
+import time
+
+SOURCES_MAP_FILE = "proxy_sources.json"
+SOURCE_STATS_FILE = "source_stats.json"
+
+# Auto-tune defaults
+MIN_CHECKED = 50        # Cần ít nhất N proxy đã check mới đánh giá nguồn
+MIN_LIVE_RATIO = 0.005  # Dưới ngưỡng này -> đẩy xuống cuối
+RETRY_DAYS = 7          # Nguồn bị bỏ qua vẫn được thử lại sau N ngày
+MAX_FAILS = 3           # Lỗi fetch liên tiếp trước khi bỏ qua nguồn
+MAX_LATENCIES = 500
+DECAY = 0.5             # Giảm trọng số lịch sử mỗi lần scrape mới
+
+
+def save_proxy_sources(proxy_sources, path=SOURCES_MAP_FILE):
+    """Save proxy -> sources attribution (sources stored once, proxies reference by index)"""
+    urls = sorted({url for urls in proxy_sources.values() for url in urls})
+    index = {url: i for i, url in enumerate(urls)}
+    data = {
+        "time": time.time(),
+        "sources": urls,
+        "proxies": {proxy: sorted(index[url] for url in urls_)
+                    for proxy, urls_ in proxy_sources.items()}
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def load_proxy_sources(path=SOURCES_MAP_FILE):
+    """Load proxy -> list of source urls, empty dict if missing"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    urls = data.get("sources", [])
+    return {proxy: [urls[i] for i in idx] for proxy, idx in data.get("proxies", {}).items()}
+
+
+class SourceStats:
+    """Per-source yield / quality metrics, persisted across runs"""
+
+    def __init__(self, path=SOURCE_STATS_FILE):
+        self.path = path
+        self.sources = {}
+        self.load()
+
+    def _entry(self, url):
+        entry = self.sources.get(url)
+        if entry is None:
+            entry = self.sources[url] = {
+                "listed": 0,
+                "unique": 0,
+                "fetch_ms": 0,
+                "ok": False,
+                "fails": 0,
+                "last_fetch": 0,
+                "checked": 0,
+                "live": 0,
+                "latencies": [],
+                "hist_checked": 0.0,
+                "hist_live": 0.0,
+            }
+        return entry
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.sources = json.load(f)
+        except (OSError, ValueError):
+            self.sources = {}
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.sources, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def record_fetch(self, url, listed, fetch_ms, ok=True):
+        """Record one source fetch (listed = valid proxy lines)"""
+        entry = self._entry(url)
+        # Lịch sử check của lần trước được giảm trọng số, rồi reset số liệu lần này
+        entry["hist_checked"] = entry["hist_checked"] * DECAY + entry["checked"]
+        entry["hist_live"] = entry["hist_live"] * DECAY + entry["live"]
+        entry.update(listed=listed, unique=0, fetch_ms=fetch_ms, ok=ok,
+                     fails=0 if ok else entry.get("fails", 0) + 1,
+                     last_fetch=time.time(), checked=0, live=0, latencies=[])
+
+    def record_attribution(self, proxy_sources):
+        """Count proxies that only one source contributed"""
+        for urls in proxy_sources.values():
+            if len(urls) == 1:
+                self._entry(next(iter(urls)))["unique"] += 1
+
+    def record_check(self, sources, alive, delay_ms=None):
+        """Record a check result against every source that listed the proxy"""
+        for url in sources:
+            entry = self._entry(url)
+            entry["checked"] += 1
+            if alive:
+                entry["live"] += 1
+                if delay_ms is not None and len(entry["latencies"]) < MAX_LATENCIES:
+                    entry["latencies"].append(delay_ms)
+
+    def live_ratio(self, url):
+        entry = self.sources.get(url)
+        if not entry:
+            return None
+        checked = entry["checked"] + entry["hist_checked"]
+        if checked < MIN_CHECKED:
+            return None
+        return (entry["live"] + entry["hist_live"]) / checked
+
+    def score(self, url):
+        """Expected live proxies contributed per fetch (unknown sources rank high)"""
+        ratio = self.live_ratio(url)
+        if ratio is None:
+            return float("inf")
+        entry = self.sources[url]
+        return ratio * max(entry["unique"], 1)
+
+    def report(self):
+        """Rows sorted by score: url, listed, unique, checked, live, ratio, median_ms"""
+        import statistics
+        rows = []
+        for url, entry in self.sources.items():
+            ratio = self.live_ratio(url)
+            rows.append({
+                "url": url,
+                "listed": entry["listed"],
+                "unique": entry["unique"],
+                "checked": entry["checked"],
+                "live": entry["live"],
+                "live_ratio": round(ratio, 4) if ratio is not None else None,
+                "median_ms": int(statistics.median(entry["latencies"])) if entry["latencies"] else None,
+                "fetch_ms": entry["fetch_ms"],
+                "ok": entry["ok"],
+            })
+        rows.sort(key=lambda r: (r["live_ratio"] is None, -(r["live_ratio"] or 0), -r["unique"]))
+        return rows
+
+    def plan(self, urls, min_live_ratio=MIN_LIVE_RATIO, retry_days=RETRY_DAYS):
+        """Auto-tune: order sources by score, skip dead ones until retry is due
+
+        Returns (ordered urls, skipped urls)
+        """
+        now = time.time()
+        keep, low, skipped = [], [], []
+        for url in urls:
+            entry = self.sources.get(url)
+            ratio = self.live_ratio(url)
+            dead = entry is not None and (entry.get("fails", 0) >= MAX_FAILS or ratio == 0)
+            if dead:
+                if now - entry["last_fetch"] >= retry_days * 86400:
+                    low.append(url)
+                else:
+                    skipped.append(url)
+            elif ratio is not None and ratio < min_live_ratio:
+                low.append(url)
+            else:
+                keep.append(url)
+        keep.sort(key=self.score, reverse=True)
+        return keep + low, skipped
@@ -0,0 +1,97 @@
+from .formats import canonical_host
+
+SCHEMES = ("http", "https", "socks4", "socks5")
+
+
+def _is_ipv4(ip):
+    parts = ip.split(".")
+    return len(parts) == 4 and all(p.isdigit() and int(p) <= 255 for p in parts)
+
+
+def _valid_port(port):
+    return port.isdigit() and 0 < int(port) < 65536
+
+
+def is_valid_proxy(line):
+    """Validate '[scheme://][user:pass@]IP:PORT' (octet 0-255 hoặc [IPv6], port 1-65535)"""
+    scheme, auth, host, port = split_proxy(line)
+    if scheme is not None and scheme not in SCHEMES or not _valid_port(port):
+        return False
+    if ":" in host:
+        return f"[{host}]:" in line and canonical_host(host) is not None  # IPv6 bắt buộc có []
+    return _is_ipv4(host)
+
+
+def split_proxy(proxy):
+    """'[scheme://][user:pass@]host:port' -> (scheme or None, 'user:pass' or None, host, port)
+
+    host of '[2001:db8::1]:8080' comes back without the brackets.
+    """
+    scheme, sep, rest = proxy.partition("://")
+    if not sep:
+        scheme, rest = None, proxy
+    auth, _, address = rest.rpartition("@")
+    if address.startswith("["):
+        host, _, port = address[1:].partition("]")
+        port = port[1:]
+    else:
+        host, _, port = address.rpartition(":")
+    return scheme and scheme.lower(), auth or None, host, port
+
+
+def format_address(host, port):
+    """host, port -> 'host:port' / '[IPv6]:port'"""
+    return f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+
+
+def guess_protocol(port):
+    """Đoán giao thức theo port thông dụng"""
+    port = str(port)
+    if port in ("1080", "1081"):
+        return "SOCKS5"
+    if port in ("1082", "1083", "1085"):
+        return "SOCKS4"
+    if port in ("443", "8443"):
+        return "HTTPS"
+    return "HTTP"
+
+
+def iter_proxies(path, pool=None):
+    """Yield lists of new proxies from a text file, chunk by chunk in file order (raises OSError)
+
+    The file is mmapped and parsed in ~4MB line-aligned chunks (in parallel when pool, a
+    ParsePool, has several workers), so the first list arrives long before a huge file has
+    been read. Duplicates are dropped across the whole file while still packed as ints.
+    """
+    from .formats import unpack
+    from .parse_pool import ParsePool
+
+    own_pool = pool is None
+    pool = pool or ParsePool(workers=1)
+    seen_keys = set()
+    seen_extra = set()
+    try:
+        for keys, extra in pool.iter_file(path):
+            fresh = [key for key in keys if key not in seen_keys]
+            seen_keys.update(fresh)
+            batch = [unpack(key) for key in fresh]
+            for proxy in extra:
+                if proxy not in seen_extra:
+                    seen_extra.add(proxy)
+                    batch.append(proxy)
+            if batch:
+                yield batch
+    finally:
+        if own_pool:
+            pool.close()
+
+
+def load_proxies(path, pool=None):
+    """Read proxies from a text file (raises OSError)
+
+    One proxy per line: ip:port, [IPv6]:port, scheme://ip:port, user:pass@ip:port,
+    ip:port:user:pass or ip:port followed by extra fields; credentials are kept and
+    duplicates (same canonical form, see formats.parse_lines) dropped. Only IP literals are
+    read, lines with a hostname are skipped. See iter_proxies to start on a huge file early.
+    """
+    return [proxy for batch in iter_proxies(path, pool) for proxy in batch]
@@ -1,10 +1,5 @@
 import sys
-import requests
-import concurrent.futures
-import time
-import json
 from datetime import datetime
-from collections import defaultdict
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
                              QLabel, QLineEdit, QComboBox, QSpinBox, QProgressBar,
@@ -13,6 +8,17 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
 from PyQt5.QtCore import QThread, pyqtSignal, Qt
 from PyQt5.QtGui import QColor, QFont
 import threading
+from daoproxy.source_stats import SourceStats
+from daoproxy.scheduler import load_previous_live, prioritize
+from daoproxy.parse_pool import ParsePool
+from daoproxy.scrape import scrape_sources
+from daoproxy.check import check_many, parse_profile, probe_judge, JUDGE_URL
+from daoproxy.validate import is_valid_proxy
+from daoproxy.export import export_txt, export_json, export_csv
+from daoproxy.index import ResultIndex, split_values
+from daoproxy import dnscache
+
+DISPLAY_LIMIT = 5000  # Số dòng tối đa hiển thị sau khi lọc (export vẫn lấy đủ)
 
 
 class ProxyScrapeThread(QThread):
@@ -20,50 +26,31 @@ class ProxyScrapeThread(QThread):
     progress = pyqtSignal(str)
     finished = pyqtSignal(set)
     
-    def __init__(self, sources):
+    def __init__(self, sources, source_stats=None):
         super().__init__()
         self.sources = sources
         self.proxies = set()
-        self.lock = threading.Lock()
+        self.proxy_sources = {}
+        self.source_stats = source_stats
+        self.pool = ParsePool()
         
-    def is_valid_proxy(self, line):
-        if ':' not in line:
-            return False
-        parts = line.split(':', 1)
-        if len(parts) != 2:
-            return False
-        ip, port = parts
-        if not port.isdigit():
-            return False
-        ip_parts = ip.split('.')
-        if len(ip_parts) != 4:
-            return False
-        for part in ip_parts:
-            if not part.isdigit() or not 0 <= int(part) <= 255:
-                return False
-        return True
+    is_valid_proxy = staticmethod(is_valid_proxy)
     
-    def fetch_source(self, url):
-        try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                count = 0
-                for line in response.text.split('\n'):
-                    line = line.strip()
-                    if self.is_valid_proxy(line):
-                        with self.lock:
-                            self.proxies.add(line)
-                        count += 1
-                self.progress.emit(f"✓ {url[:60]}... (+{count})")
-                return count
-        except Exception as e:
+    def on_source(self, url, added, error):
+        if error is None:
+            self.progress.emit(f"✓ {url[:60]}... (+{added})")
+        else:
             self.progress.emit(f"✗ {url[:60]}... (Error)")
-        return 0
     
     def run(self):
         self.progress.emit(f"Starting scrape from {len(self.sources)} sources...")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=50) as executor:
-            list(executor.map(self.fetch_source, self.sources))
+        dnscache.install(dnscache.hosts_of(self.sources))
+        try:
+            self.proxy_sources = scrape_sources(self.sources, workers=50, source_stats=self.source_stats,
+                                                on_source=self.on_source, pool=self.pool)
+        finally:
+            self.pool.close()
+        self.proxies = set(self.proxy_sources)
         self.progress.emit(f"\n✓ Scraped {len(self.proxies)} unique proxies!")
         self.finished.emit(self.proxies)
 
@@ -74,72 +61,60 @@ class ProxyCheckThread(QThread):
     status = pyqtSignal(str)
     finished = pyqtSignal(list)
     
-    def __init__(self, proxies, timeout, protocol):
+    def __init__(self, proxies, timeout, protocol, proxy_sources=None, source_stats=None,
+                 previous_live=(), stop_after=0, profiles=(), fast_timeout=0):
         super().__init__()
         self.proxies = list(proxies)
         self.timeout = timeout
+        self.fast_timeout = fast_timeout
         self.protocol = protocol
+        self.proxy_sources = proxy_sources or {}
+        self.source_stats = source_stats
+        self.previous_live = previous_live
+        self.stop_after = stop_after
+        self.profiles = profiles
+        self.real_ip = None
+        self.stopping = threading.Event()
         self.live_proxies = []
         self.lock = threading.Lock()
         self.checked = 0
         
-    def check_proxy(self, proxy):
-        try:
-            if self.protocol == "SOCKS5":
-                proxies_dict = {
-                    "http": f"socks5://{proxy}",
-                    "https": f"socks5://{proxy}"
-                }
-            else:
-                proxies_dict = {
-                    "http": f"http://{proxy}",
-                    "https": f"http://{proxy}"
-                }
-            
-            start = time.time()
-            response = requests.get(
-                "http://ip-api.com/json",
-                proxies=proxies_dict,
-                timeout=self.timeout,
-                headers={"User-Agent": "Mozilla/5.0"}
-            )
-            ping = int((time.time() - start) * 1000)
-            
-            if response.status_code == 200:
-                data = response.json()
-                result = {
-                    "proxy": proxy,
-                    "host": proxy.split(':')[0],
-                    "port": proxy.split(':')[1],
-                    "country": data.get("country", "Unknown"),
-                    "city": data.get("city", "Unknown"),
-                    "isp": data.get("isp", "Unknown"),
-                    "ping": ping,
-                    "protocol": self.protocol,
-                    "status": "LIVE"
-                }
-                
-                with self.lock:
-                    self.live_proxies.append(result)
-                    self.checked += 1
-                
-                self.progress.emit(result)
-                return result
-                
-        except Exception as e:
-            pass
+    def stop(self):
+        """Bỏ qua các proxy còn trong hàng đợi"""
+        self.stopping.set()
         
+    def on_result(self, proxy, result):
         with self.lock:
             self.checked += 1
+            if result is not None:
+                result["sources"] = len(self.proxy_sources.get(proxy, ()))
+                self.record_source(proxy, True, result["ping"])
+            else:
+                self.record_source(proxy, False)
         
-        self.status.emit(f"Checked: {self.checked}/{len(self.proxies)}")
-        return None
+        if result is not None:
+            self.progress.emit(result)
+        else:
+            self.status.emit(f"Checked: {self.checked}/{len(self.proxies)}")
+    
+    def record_source(self, proxy, alive, ping=None):
+        """Gán kết quả check cho các nguồn đã liệt kê proxy (gọi khi đang giữ lock)"""
+        if self.source_stats is not None and proxy in self.proxy_sources:
+            self.source_stats.record_check(self.proxy_sources[proxy], alive, ping)
     
     def run(self):
         self.status.emit(f"Checking {len(self.proxies)} proxies...")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=150) as executor:
-            futures = [executor.submit(self.check_proxy, proxy) for proxy in self.proxies]
-            concurrent.futures.wait(futures)
+        dnscache.install(dnscache.hosts_of([JUDGE_URL] + [p.url for p in self.profiles]))
+        # IP thật của mình để nhận ra proxy transparent (một request, chạy trong thread này)
+        self.real_ip, echoes_headers = probe_judge(JUDGE_URL, self.timeout)
+        if not echoes_headers:
+            self.status.emit("Judge does not echo headers: anonymity limited to Transparent / Unknown")
+        # Proxy có khả năng sống cao nhất được check trước
+        self.proxies = prioritize(self.proxies, self.previous_live, self.proxy_sources, self.source_stats)
+        # Fast lane: timeout ngắn cho tất cả; proxy bị timeout (không phải bị từ chối) sang slow lane
+        self.live_proxies = check_many(self.proxies, self.timeout, 150, self.protocol, JUDGE_URL, self.on_result,
+                                       self.stop_after, self.stopping, self.profiles, self.real_ip,
+                                       fast_timeout=self.fast_timeout)
         self.finished.emit(self.live_proxies)
 
 
@@ -147,8 +122,12 @@ class ProxyToolGUI(QMainWindow):
     def __init__(self):
         super().__init__()
         self.proxies = set()
+        self.proxy_sources = {}
+        self.source_stats = SourceStats()
         self.live_proxies = []
         self.filtered_proxies = []
+        self.index = ResultIndex()
+        self.active_filter = {}
         self.init_ui()
         self.load_sources()
         
@@ -294,14 +273,44 @@ class ProxyToolGUI(QMainWindow):
         self.timeout_spin.setValue(10)
         row1.addWidget(self.timeout_spin)
         
+        row1.addWidget(QLabel("Fast (s):"))
+        self.fast_timeout_spin = QSpinBox()
+        self.fast_timeout_spin.setRange(0, 30)
+        self.fast_timeout_spin.setValue(3)
+        self.fast_timeout_spin.setToolTip("First-pass timeout; only proxies that connect but time out are retried "
+                                          "with the full timeout (0 = single pass)")
+        row1.addWidget(self.fast_timeout_spin)
+        
         row1.addWidget(QLabel("Threads:"))
         self.threads_spin = QSpinBox()
         self.threads_spin.setRange(10, 500)
         self.threads_spin.setValue(150)
         row1.addWidget(self.threads_spin)
         
+        row1.addWidget(QLabel("Stop after (live):"))
+        self.stop_after_spin = QSpinBox()
+        self.stop_after_spin.setRange(0, 100000)
+        self.stop_after_spin.setSpecialValueText("All")
+        self.stop_after_spin.setValue(0)
+        row1.addWidget(self.stop_after_spin)
+        
+        self.auto_tune_check = QCheckBox("Auto-tune sources")
+        self.auto_tune_check.setToolTip("Skip / deprioritise low-yield sources based on previous runs")
+        row1.addWidget(self.auto_tune_check)
+        
         control_layout.addLayout(row1)
         
+        # Row 1b: Verification profiles (run only for proxies that passed the judge)
+        row_verify = QHBoxLayout()
+        self.verify_https_check = QCheckBox("Verify HTTPS CONNECT")
+        self.verify_https_check.setToolTip("Also open an HTTPS tunnel through each live proxy")
+        row_verify.addWidget(self.verify_https_check)
+        row_verify.addWidget(QLabel("Target URL:"))
+        self.target_url_edit = QLineEdit()
+        self.target_url_edit.setPlaceholderText("optional, e.g. https://example.com/|200|Welcome")
+        row_verify.addWidget(self.target_url_edit)
+        control_layout.addLayout(row_verify)
+        
         # Row 2: Buttons
         row2 = QHBoxLayout()
         self.scrape_btn = QPushButton("🔍 Scrape Proxies")
@@ -314,6 +323,7 @@ class ProxyToolGUI(QMainWindow):
         row2.addWidget(self.check_btn)
         
         self.stop_btn = QPushButton("⛔ Stop")
+        self.stop_btn.clicked.connect(self.stop_check)
         self.stop_btn.setEnabled(False)
         row2.addWidget(self.stop_btn)
         
@@ -366,6 +376,21 @@ class ProxyToolGUI(QMainWindow):
         self.ping_filter.setValue(5000)
         filter_layout.addWidget(self.ping_filter)
         
+        filter_layout.addWidget(QLabel("Min Anonymity:"))
+        self.anonymity_filter = QComboBox()
+        self.anonymity_filter.addItems(["Any", "Transparent", "Anonymous", "Elite"])
+        filter_layout.addWidget(self.anonymity_filter)
+        
+        filter_layout.addWidget(QLabel("Protocol:"))
+        self.protocol_filter = QComboBox()
+        self.protocol_filter.addItems(["Any", "HTTP", "HTTPS", "SOCKS4", "SOCKS5"])
+        filter_layout.addWidget(self.protocol_filter)
+        
+        filter_layout.addWidget(QLabel("ASN:"))
+        self.asn_filter = QLineEdit()
+        self.asn_filter.setPlaceholderText("e.g. AS7713, AS45899")
+        filter_layout.addWidget(self.asn_filter)
+        
         self.apply_filter_btn = QPushButton("Apply Filter")
         self.apply_filter_btn.clicked.connect(self.apply_filters)
         filter_layout.addWidget(self.apply_filter_btn)
@@ -401,9 +426,9 @@ class ProxyToolGUI(QMainWindow):
         results_layout = QVBoxLayout()
         
         self.results_table = QTableWidget()
-        self.results_table.setColumnCount(8)
+        self.results_table.setColumnCount(9)
         self.results_table.setHorizontalHeaderLabels([
-            "Status", "Host", "Port", "Country", "City", "ISP", "Ping (ms)", "Protocol"
+            "Status", "Host", "Port", "Country", "City", "ISP", "Ping (ms)", "Protocol", "Anonymity"
         ])
         self.results_table.horizontalHeader().setStretchLastSection(True)
         self.results_table.setSelectionBehavior(QTableWidget.SelectRows)
@@ -411,7 +436,7 @@ class ProxyToolGUI(QMainWindow):
         
         # Auto-resize columns
         header = self.results_table.horizontalHeader()
-        for i in range(8):
+        for i in range(9):
             header.setSectionResizeMode(i, QHeaderView.ResizeToContents)
         
         results_layout.addWidget(self.results_table)
@@ -471,7 +496,13 @@ class ProxyToolGUI(QMainWindow):
         self.status_label.setText("Status: Scraping proxies...")
         self.status_label.setStyleSheet("color: #f9e2af; font-weight: bold;")
         
-        self.scrape_thread = ProxyScrapeThread(self.sources)
+        sources = self.sources
+        if self.auto_tune_check.isChecked():
+            sources, skipped = self.source_stats.plan(self.sources)
+            if skipped:
+                self.log(f"⚙️ Auto-tune: skipping {len(skipped)} low-yield sources")
+        
+        self.scrape_thread = ProxyScrapeThread(sources, self.source_stats)
         self.scrape_thread.progress.connect(self.log)
         self.scrape_thread.finished.connect(self.on_scrape_finished)
         self.scrape_thread.start()
@@ -479,6 +510,8 @@ class ProxyToolGUI(QMainWindow):
     def on_scrape_finished(self, proxies):
         """Handle scrape completion"""
         self.proxies = proxies
+        self.proxy_sources = self.scrape_thread.proxy_sources
+        self.source_stats.save()
         self.log(f"✅ Scraping completed! Found {len(proxies)} proxies")
         self.status_label.setText(f"Status: Ready - {len(proxies)} proxies scraped")
         self.status_label.setStyleSheet("color: #a6e3a1; font-weight: bold;")
@@ -491,6 +524,17 @@ class ProxyToolGUI(QMainWindow):
             QMessageBox.warning(self, "Warning", "No proxies to check! Please scrape first.")
             return
             
+        profiles = []
+        if self.verify_https_check.isChecked():
+            profiles.append(parse_profile("https"))
+        target = self.target_url_edit.text().strip()
+        if target:
+            try:
+                profiles.append(parse_profile(f"target={target}"))
+            except ValueError as e:
+                QMessageBox.warning(self, "Warning", f"Invalid target URL: {e}")
+                return
+            
         self.log(f"✅ Starting proxy check for {len(self.proxies)} proxies...")
         self.check_btn.setEnabled(False)
         self.scrape_btn.setEnabled(False)
@@ -502,17 +546,39 @@ class ProxyToolGUI(QMainWindow):
         protocol = self.protocol_combo.currentText()
         timeout = self.timeout_spin.value()
         
+        previous_live = load_previous_live() | {p["proxy"] for p in self.live_proxies}
         self.live_proxies = []
+        self.filtered_proxies = []
+        self.index.clear()
         self.results_table.setRowCount(0)
+        self.stop_btn.setEnabled(True)
         
-        self.check_thread = ProxyCheckThread(self.proxies, timeout, protocol)
+        self.check_thread = ProxyCheckThread(self.proxies, timeout, protocol,
+                                             self.proxy_sources, self.source_stats,
+                                             previous_live, self.stop_after_spin.value(), profiles,
+                                             self.fast_timeout_spin.value())
         self.check_thread.progress.connect(self.on_proxy_checked)
         self.check_thread.status.connect(self.log)
         self.check_thread.finished.connect(self.on_check_finished)
         self.check_thread.start()
         
+    def stop_check(self):
+        """Stop the running check, keep what was found so far"""
+        if hasattr(self, "check_thread") and self.check_thread.isRunning():
+            self.check_thread.stop()
+            self.log("⛔ Stopping check...")
+        self.stop_btn.setEnabled(False)
+        
     def on_proxy_checked(self, result):
-        """Update table when proxy is checked"""
+        """Index the new result, show it if it passes the active filter"""
+        self.index.add(result)
+        if ResultIndex.matches(result, **self.active_filter):
+            self.filtered_proxies.append(result)
+            if self.results_table.rowCount() < DISPLAY_LIMIT:
+                self.add_row(result)
+        self.progress_bar.setValue(self.progress_bar.value() + 1)
+        
+    def add_row(self, result):
         row = self.results_table.rowCount()
         self.results_table.insertRow(row)
         
@@ -539,15 +605,23 @@ class ProxyToolGUI(QMainWindow):
         self.results_table.setItem(row, 6, ping_item)
         
         self.results_table.setItem(row, 7, QTableWidgetItem(result["protocol"]))
+        self.results_table.setItem(row, 8, QTableWidgetItem(result["anonymity"]))
         
-        self.progress_bar.setValue(self.progress_bar.value() + 1)
+    def render_rows(self, results):
+        """Replace the table contents (first DISPLAY_LIMIT results)"""
+        self.results_table.setUpdatesEnabled(False)
+        self.results_table.setRowCount(0)
+        for result in results[:DISPLAY_LIMIT]:
+            self.add_row(result)
+        self.results_table.setUpdatesEnabled(True)
         
     def on_check_finished(self, live_proxies):
         """Handle check completion"""
         self.live_proxies = live_proxies
-        self.filtered_proxies = live_proxies.copy()
+        self.filtered_proxies = self.index.query(**self.active_filter)
         
-        total = len(self.proxies)
+        # Khi dừng sớm chỉ tính các proxy đã check
+        total = self.check_thread.checked if self.check_thread.stopping.is_set() else len(self.proxies)
         live = len(live_proxies)
         dead = total - live
         rate = round(live / total * 100, 2) if total > 0 else 0
@@ -559,36 +633,53 @@ class ProxyToolGUI(QMainWindow):
         
         self.check_btn.setEnabled(True)
         self.scrape_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        
+        if self.proxy_sources:
+            self.source_stats.save()
+            self.log_source_report()
         
         QMessageBox.information(self, "Success", 
                                f"Check completed!\n\nLive: {live}\nDead: {dead}\nSuccess Rate: {rate}%")
         
-    def apply_filters(self):
-        """Apply filters to results"""
-        country = self.country_filter.text().strip().lower()
-        max_ping = self.ping_filter.value()
-        
-        self.filtered_proxies = [
-            p for p in self.live_proxies
-            if (not country or country in p["country"].lower()) and p["ping"] <= max_ping
-        ]
+    def log_source_report(self, limit=5):
+        """Log best / worst sources by live ratio"""
+        rows = [r for r in self.source_stats.report() if r["live_ratio"] is not None]
+        if not rows:
+            return
+        self.log("📈 Source quality (live% | unique | median ping):")
+        for r in rows[:limit] + rows[-limit:] if len(rows) > 2 * limit else rows:
+            median = f"{r['median_ms']}ms" if r["median_ms"] is not None else "-"
+            self.log(f"   {r['live_ratio'] * 100:.2f}% | {r['unique']} | {median} | {r['url'][:60]}")
         
-        self.results_table.setRowCount(0)
-        for result in self.filtered_proxies:
-            self.on_proxy_checked(result)
-            
-        self.log(f"🔍 Filter applied: {len(self.filtered_proxies)} proxies match criteria")
+    def apply_filters(self):
+        """Query the result index, fastest first; new results keep being matched while checking"""
+        anonymity = self.anonymity_filter.currentText()
+        protocol = self.protocol_filter.currentText()
+        self.active_filter = {
+            "country": split_values(self.country_filter.text()),
+            "protocol": [protocol] if protocol != "Any" else None,
+            "asn": split_values(self.asn_filter.text()),
+            "anonymity": anonymity if anonymity != "Any" else None,
+            "max_ping": self.ping_filter.value(),
+        }
+        self.filtered_proxies = self.index.query(**self.active_filter)
+        self.render_rows(self.filtered_proxies)
+        
+        shown = "" if len(self.filtered_proxies) <= DISPLAY_LIMIT else f" (showing fastest {DISPLAY_LIMIT})"
+        self.log(f"🔍 Filter applied: {len(self.filtered_proxies)} proxies match criteria{shown}")
         
     def reset_filters(self):
         """Reset filters"""
         self.country_filter.clear()
+        self.asn_filter.clear()
         self.ping_filter.setValue(5000)
-        self.filtered_proxies = self.live_proxies.copy()
+        self.anonymity_filter.setCurrentIndex(0)
+        self.protocol_filter.setCurrentIndex(0)
+        self.active_filter = {}
+        self.filtered_proxies = self.index.query()
+        self.render_rows(self.filtered_proxies)
         
-        self.results_table.setRowCount(0)
-        for result in self.live_proxies:
-            self.on_proxy_checked(result)
-            
         self.log("🔄 Filters reset")
         
     def export_proxies(self, format_type):
@@ -598,39 +689,19 @@ class ProxyToolGUI(QMainWindow):
             return
             
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        if format_type == "txt":
-            filename, _ = QFileDialog.getSaveFileName(
-                self, "Save File", f"live_proxies_{timestamp}.txt", "Text Files (*.txt)"
-            )
-            if filename:
-                with open(filename, 'w', encoding='utf-8') as f:
-                    for p in sorted(self.filtered_proxies, key=lambda x: x["ping"]):
-                        f.write(f"{p['proxy']} | {p['country']} | {p['ping']}ms | {p['protocol']}\n")
-                self.log(f"💾 Exported {len(self.filtered_proxies)} proxies to {filename}")
-                QMessageBox.information(self, "Success", f"Exported to {filename}")
-                
-        elif format_type == "json":
-            filename, _ = QFileDialog.getSaveFileName(
-                self, "Save File", f"live_proxies_{timestamp}.json", "JSON Files (*.json)"
-            )
-            if filename:
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(self.filtered_proxies, f, indent=2)
-                self.log(f"💾 Exported {len(self.filtered_proxies)} proxies to {filename}")
-                QMessageBox.information(self, "Success", f"Exported to {filename}")
-                
-        elif format_type == "csv":
-            filename, _ = QFileDialog.getSaveFileName(
-                self, "Save File", f"live_proxies_{timestamp}.csv", "CSV Files (*.csv)"
-            )
-            if filename:
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write("Host,Port,Country,City,ISP,Ping,Protocol\n")
-                    for p in sorted(self.filtered_proxies, key=lambda x: x["ping"]):
-                        f.write(f"{p['host']},{p['port']},{p['country']},{p['city']},{p['isp']},{p['ping']},{p['protocol']}\n")
-                self.log(f"💾 Exported {len(self.filtered_proxies)} proxies to {filename}")
-                QMessageBox.information(self, "Success", f"Exported to {filename}")
+        exporters = {
+            "txt": (export_txt, "Text Files (*.txt)"),
+            "json": (export_json, "JSON Files (*.json)"),
+            "csv": (export_csv, "CSV Files (*.csv)"),
+        }
+        exporter, file_filter = exporters[format_type]
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Save File", f"live_proxies_{timestamp}.{format_type}", file_filter
+        )
+        if filename:
+            exporter(self.filtered_proxies, filename)
+            self.log(f"💾 Exported {len(self.filtered_proxies)} proxies to {filename}")
+            QMessageBox.information(self, "Success", f"Exported to {filename}")
                 
     def clear_all(self):
         """Clear all data"""
@@ -643,6 +714,7 @@ class ProxyToolGUI(QMainWindow):
             self.proxies = set()
             self.live_proxies = []
             self.filtered_proxies = []
+            self.index.clear()
             self.results_table.setRowCount(0)
             self.log_text.clear()
             self.progress_bar.setValue(0)